@@ -0,0 +1,17 @@
+#!/bin/bash
+# Runs once when the primary's data directory is initialized: creates the role the
+# replicas stream from and allows it to connect for replication.
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "${POSTGRES_DB:-$POSTGRES_USER}" <<-SQL
+    DO \$\$
+    BEGIN
+        CREATE ROLE replicator WITH REPLICATION LOGIN PASSWORD '${REPLICATION_PASSWORD:-replicator}';
+    EXCEPTION
+        WHEN duplicate_object THEN NULL;
+    END
+    \$\$;
+SQL
+
+echo "host replication replicator all scram-sha-256" >> "$PGDATA/pg_hba.conf"
+psql --username "$POSTGRES_USER" --dbname "${POSTGRES_DB:-$POSTGRES_USER}" -c "SELECT pg_reload_conf()"
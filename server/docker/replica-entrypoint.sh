@@ -0,0 +1,25 @@
+#!/bin/bash
+# Starts a hot-standby replica, cloning the primary with pg_basebackup on first start.
+set -e
+
+PGDATA=${PGDATA:-/var/lib/postgresql/data}
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    echo "Cloning primary ${PRIMARY_HOST}:${PRIMARY_PORT:-5432} into $PGDATA"
+    mkdir -p "$PGDATA"
+    chown postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+    until gosu postgres env PGPASSWORD="${REPLICATION_PASSWORD:-replicator}" pg_basebackup \
+        --host="$PRIMARY_HOST" \
+        --port="${PRIMARY_PORT:-5432}" \
+        --username=replicator \
+        --pgdata="$PGDATA" \
+        --wal-method=stream \
+        --write-recovery-conf; do
+        echo "Primary not ready yet, retrying..."
+        rm -rf "${PGDATA:?}"/*
+        sleep 2
+    done
+fi
+
+exec gosu postgres postgres -c hot_standby=on
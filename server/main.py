@@ -1,19 +1,51 @@
 import os
-from fastapi import FastAPI, HTTPException
+import time
+import asyncio
+import uuid
+import shutil
+import hashlib
+from datetime import datetime
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, NamedTuple, Optional
+from dotenv import load_dotenv
+
+# Load environment variables before importing modules that read them at import time
+load_dotenv()
+
 from src.semantic_search import SemanticSearchClient
 from anthropic import Anthropic
 import json
-from dotenv import load_dotenv
 from src.ask_your_pdf_client import AskYourPdfClient
+from src.metrics import REQUEST_DURATION, REQUESTS_IN_FLIGHT, record_cache_lookup, render_metrics, track_stage
+from src.semantic_cache import SemanticQueryCache
+from src.context_builder import build_context
+from src.admission import AdmissionLimiter, AdmissionRejected, Deadline, DeadlineExceeded
+from src.single_flight import SingleFlight, normalize_query
+from src.warmup import PrecomputedAnswers, load_curated_questions
+from src.postgres_client import PostgresClient
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the background cache maintenance and answer precomputation while the server runs."""
+    semantic_cache.start()
+    curated_answers.start()
+    curated_ask_answers.start()
+    yield
+    curated_ask_answers.stop()
+    curated_answers.stop()
+    semantic_cache.stop()
 
 app = FastAPI(
     title="Aviaite API",
     description="API for aviation document search and analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -25,17 +57,116 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized uploads from their Content-Length, before the body is spooled to disk."""
+    if request.method == "POST" and request.url.path == "/api/documents":
+        content_length = request.headers.get("content-length")
+        # Allow for the multipart framing around the file
+        if content_length and content_length.isdigit() and int(content_length) > UPLOAD_MAX_BYTES + 64 * 1024:
+            return JSONResponse(status_code=413, content={"detail": f"File exceeds {UPLOAD_MAX_BYTES} bytes"})
+    return await call_next(request)
+
+@app.middleware("http")
+async def track_request_metrics(request: Request, call_next):
+    """Record in-flight requests and total request time per endpoint."""
+    # Use the route template (not the raw path) to keep label cardinality bounded;
+    # unknown paths (404s, scanners) share a single label
+    endpoint = "unmatched"
+    for route in app.router.routes:
+        if route.matches(request.scope)[0].name == "FULL":
+            endpoint = route.path
+            break
+
+    start = time.perf_counter()
+    status = 500
+    REQUESTS_IN_FLIGHT.labels(endpoint=endpoint).inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.labels(endpoint=endpoint).dec()
+        REQUEST_DURATION.labels(
+            method=request.method,
+            endpoint=endpoint,
+            status=str(status)
+        ).observe(time.perf_counter() - start)
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Shed load with a fast 429/503 that tells the client when to retry."""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    """Report requests that ran out of time."""
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
 # Initialize the semantic search client (reuse the same instance)
 semantic_client = SemanticSearchClient()
-load_dotenv()
-print(f"Anthropic API Key: {os.getenv('ANTHROPIC_API_KEY')}")
+if not os.getenv('ANTHROPIC_API_KEY'):
+    print("Warning: ANTHROPIC_API_KEY is not set")
 anthropic_client = Anthropic(
-    api_key=os.getenv('ANTHROPIC_API_KEY')
+    api_key=os.getenv('ANTHROPIC_API_KEY'),
+    # Retries would each get the full remaining budget and overrun the request deadline
+    max_retries=0
+)
+
+# Reuse answers for near-duplicate questions until the corpus changes
+semantic_cache = SemanticQueryCache(
+    embedding_dim=semantic_client.embedding_manager.embedding_dim,
+    similarity_threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92')),
+    max_entries=int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '1000')),
+    corpus_version_fn=semantic_client.corpus_version,
+    version_check_interval=float(os.getenv('SEMANTIC_CACHE_VERSION_CHECK_INTERVAL', '10'))
 )
 
+# Token budget for the search results sent to Claude
+CONTEXT_MAX_TOKENS = int(os.getenv('CONTEXT_MAX_TOKENS', '3000'))
+
 # Initialize AskYourPdf client
 ask_your_pdf_client = AskYourPdfClient()
 
+# Total time budget of a request, including time spent waiting for a concurrency slot
+REQUEST_TIMEOUT = float(os.getenv('REQUEST_TIMEOUT', '30'))
+ADMISSION_MAX_QUEUE_WAIT = float(os.getenv('ADMISSION_MAX_QUEUE_WAIT', '5'))
+
+# Per-endpoint admission control: embedding is CPU-bound, so searches get few slots,
+# while Claude and AskYourPdf calls mostly wait on the network
+search_limiter = AdmissionLimiter(
+    '/api/search',
+    max_concurrent=int(os.getenv('SEARCH_MAX_CONCURRENCY', '4')),
+    max_queue=int(os.getenv('SEARCH_MAX_QUEUE', '16')),
+    max_queue_wait=ADMISSION_MAX_QUEUE_WAIT
+)
+batch_search_limiter = AdmissionLimiter(
+    '/api/search/batch',
+    max_concurrent=int(os.getenv('SEARCH_BATCH_MAX_CONCURRENCY', '1')),
+    max_queue=int(os.getenv('SEARCH_BATCH_MAX_QUEUE', '4')),
+    max_queue_wait=ADMISSION_MAX_QUEUE_WAIT
+)
+llm_limiter = AdmissionLimiter(
+    'llm',
+    max_concurrent=int(os.getenv('LLM_MAX_CONCURRENCY', '16')),
+    max_queue=int(os.getenv('LLM_MAX_QUEUE', '64')),
+    max_queue_wait=ADMISSION_MAX_QUEUE_WAIT
+)
+ask_limiter = AdmissionLimiter(
+    '/api/ask',
+    max_concurrent=int(os.getenv('ASK_MAX_CONCURRENCY', '8')),
+    max_queue=int(os.getenv('ASK_MAX_QUEUE', '32')),
+    max_queue_wait=ADMISSION_MAX_QUEUE_WAIT
+)
+
+# Concurrent identical questions (e.g. the welcome page's sample questions) share one execution
+search_flights = SingleFlight('/api/search')
+ask_flights = SingleFlight('/api/ask')
+
 class SearchQuery(BaseModel):
     """Model for semantic search requests"""
     query: str
@@ -56,6 +187,39 @@ class SearchResponse(BaseModel):
     query: str
     analysis: Dict[str, Any]
 
+class BatchSearchQuery(BaseModel):
+    """Model for batch semantic search requests"""
+    queries: List[str] = Field(..., min_length=1, max_length=int(os.getenv('SEARCH_BATCH_MAX_QUERIES', '100')))
+    similarity_threshold: float = 0.5
+    max_results: int = 5
+
+class BatchSearchItem(BaseModel):
+    """Model for the results of one query in a batch"""
+    query: str
+    results: List[SearchResult]
+    total_results: int
+
+class BatchSearchResponse(BaseModel):
+    """Model for batch search response"""
+    results: List[BatchSearchItem]
+    total_queries: int
+
+class SuggestionsResponse(BaseModel):
+    """Model for the curated question list"""
+    questions: List[str]
+
+class IngestionJob(BaseModel):
+    """Model for the status of an uploaded document's ingestion"""
+    job_id: int
+    filename: str
+    status: str  # queued, running, completed, failed
+    total_chunks: Optional[int] = None
+    processed_chunks: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 class KnowledgeBaseQuery(BaseModel):
     """Model for knowledge base queries"""
     query: str
@@ -74,14 +238,120 @@ async def semantic_search(search_request: SearchQuery):
     Returns:
         SearchResponse: The search results with metadata and Claude's analysis
     """
+    key = search_key(search_request)
+
+    # Curated questions are answered ahead of time
+    precomputed = curated_answers.get(key)
+    record_cache_lookup('precomputed', precomputed is not None)
+    if precomputed is not None:
+        return precomputed.model_copy(update={'query': search_request.query})
+
+    async def execute():
+        deadline = Deadline(REQUEST_TIMEOUT)
+        # Blocking work runs in the threadpool so the event loop keeps admitting and shedding requests.
+        # Only the CPU-bound embedding and search hold a search slot; the Claude call waits on the
+        # network and is limited separately, so slow LLM responses never starve the embedding model.
+        async with search_limiter.slot(deadline):
+            retrieval = await run_blocking(deadline, 'search', retrieve_search_results, search_request, deadline)
+        if retrieval.cached is not None:
+            return retrieval.cached
+        async with llm_limiter.slot(deadline):
+            return await run_blocking(deadline, 'llm', analyze_search_results, search_request, retrieval, deadline)
+
+    response = await search_flights.do(key, execute)
+    return response.model_copy(update={'query': search_request.query})
+
+async def run_blocking(deadline: Deadline, stage: str, func, *args):
+    """
+    Run blocking work in the threadpool, answering with a 504 as soon as the deadline passes.
+
+    The thread itself cannot be interrupted; it finishes in the background, bounded by the
+    downstream timeouts it was given.
+    """
+    try:
+        return await asyncio.wait_for(run_in_threadpool(func, *args), timeout=deadline.remaining())
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(stage)
+
+def search_key(search_request: SearchQuery) -> tuple:
+    """Identify a search by its normalized question and parameters."""
+    return (normalize_query(search_request.query), search_request.similarity_threshold, search_request.max_results)
+
+@contextmanager
+def search_errors(deadline: Deadline):
+    """Report a failed search stage as a 504 once the deadline has passed, and as a 500 otherwise."""
     try:
+        yield
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        if deadline.expired():
+            raise DeadlineExceeded('search') from e
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error performing semantic search: {str(e)}"
+        )
+
+class SearchRetrieval(NamedTuple):
+    """Outcome of the retrieval stage of a search"""
+    query_embedding: Any
+    results: List[Dict[str, Any]]
+    cached: Optional[SearchResponse]  # Set on a semantic cache hit
+    cache_generation: int  # Semantic cache generation the results were retrieved in
+
+def retrieve_search_results(search_request: SearchQuery, deadline: Deadline, use_cache: bool = True) -> SearchRetrieval:
+    """
+    Embed the query and either answer it from the semantic cache or retrieve similar chunks.
+
+    Args:
+        search_request (SearchQuery): The search request containing the query and parameters
+        deadline (Deadline): Deadline of the request
+        use_cache (bool): Look the query up in the semantic cache first
+
+    Returns:
+        SearchRetrieval: The query embedding, the similar chunks or the cached response
+    """
+    with search_errors(deadline):
+        # Captured before retrieval, so an answer built from a corpus that changed meanwhile is not cached
+        cache_generation = semantic_cache.generation
+
+        deadline.check('embed')
+        query_embedding = semantic_client.embed_query(search_request.query)
+
+        # Serve near-duplicate questions from the semantic cache
+        if use_cache:
+            cached = semantic_cache.lookup(query_embedding, (search_request.similarity_threshold, search_request.max_results))
+            record_cache_lookup('semantic', cached is not None)
+        else:
+            cached = None
+        if cached is not None:
+            return SearchRetrieval(query_embedding, [], cached.response.model_copy(update={'query': search_request.query}),
+                                   cache_generation)
+
         # Perform the search
-        results = semantic_client.search_similar(
-            query_text=search_request.query,
+        deadline.check('db')
+        results = semantic_client.search_by_embedding(
+            query_embedding,
             similarity_threshold=search_request.similarity_threshold,
-            max_results=search_request.max_results
+            max_results=search_request.max_results,
+            timeout=deadline.remaining()
         )
-        
+        deadline.check('db')
+        return SearchRetrieval(query_embedding, results, None, cache_generation)
+
+def analyze_search_results(search_request: SearchQuery, retrieval: SearchRetrieval, deadline: Deadline) -> SearchResponse:
+    """
+    Analyze retrieved chunks with Claude and cache the response.
+
+    Args:
+        search_request (SearchQuery): The search request containing the query and parameters
+        retrieval (SearchRetrieval): Output of retrieve_search_results (a cache miss)
+        deadline (Deadline): Deadline of the request
+
+    Returns:
+        SearchResponse: The search results with metadata and Claude's analysis
+    """
+    with search_errors(deadline):
         # Convert results to response model
         search_results = [
             SearchResult(
@@ -90,23 +360,15 @@ async def semantic_search(search_request: SearchQuery):
                 similarity=result['similarity'],
                 metadata=result['metadata']
             )
-            for result in results
+            for result in retrieval.results
         ]
 
-        # Prepare context for Claude
-        context = "\n\n".join([
-            f"Document {r.chunk_id} (similarity: {r.similarity:.2f}):\n{r.chunk_text}"
-            for r in search_results
-        ])
+        # Prepare context for Claude, merging overlapping chunks so shared text is only sent once
+        with track_stage('context'):
+            context, _ = build_context(retrieval.results, max_tokens=CONTEXT_MAX_TOKENS)
         
         # Get analysis from Claude
-        message = anthropic_client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=1000,
-            temperature=0.2,
-            messages=[{
-                "role": "user",
-                "content": f"""Based on the following search results for the query "{search_request.query}",
+        prompt = f"""Based on the following search results for the query "{search_request.query}",
                 formart the answer like this:
                 {{
                     "answer": string,
@@ -114,26 +376,148 @@ async def semantic_search(search_request: SearchQuery):
                 provide a concise (4 lines maximum, 2 lines is ideal) analysis and summary of the relevant information (PLEASE GIVEN BACK THE ANSWER WITHOUT ANY OTHER TEXT) :
 
                 {context}"""
-            }]
-        )
+        deadline.check('llm')
+        with track_stage('llm'):
+            message = anthropic_client.messages.create(
+                model="claude-3-sonnet-20240229",
+                max_tokens=1000,
+                temperature=0.2,
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }],
+                timeout=deadline.remaining()
+            )
         
         # Extract the text content from Claude's response
+        analysis_parsed = False
         try:
-            analysis_json = json.loads(message.content[0].text) if message.content else {"answer": "No analysis available", "chunk_ids": []}
+            analysis_json = json.loads(message.content[0].text) if message.content else NO_ANALYSIS
+            analysis_parsed = bool(message.content)
         except json.JSONDecodeError:
-            analysis_text = "Error parsing analysis response"
+            analysis_json = ANALYSIS_PARSE_ERROR
         
-        return SearchResponse(
+        response = SearchResponse(
             results=search_results,
             total_results=len(search_results),
             query=search_request.query,
             analysis=analysis_json
         )
+
+        # Only cache real answers, so a failed analysis is retried on the next request
+        # (retrieval failures raise before this point and are never cached)
+        if analysis_parsed:
+            semantic_cache.store(
+                query=search_request.query,
+                query_embedding=retrieval.query_embedding,
+                params=(search_request.similarity_threshold, search_request.max_results),
+                chunk_ids=[r.chunk_id for r in search_results],
+                response=response,
+                generation=retrieval.cache_generation
+            )
+        return response
+
+# Analyses returned when Claude's answer is missing or unreadable; these are never cached or precomputed
+NO_ANALYSIS = {"answer": "No analysis available", "chunk_ids": []}
+ANALYSIS_PARSE_ERROR = {"answer": "Error parsing analysis response"}
+
+def run_semantic_search(search_request: SearchQuery, deadline: Deadline, use_cache: bool = True) -> SearchResponse:
+    """
+    Run a semantic search with Claude analysis within the request deadline (without admission control).
+    
+    Args:
+        search_request (SearchQuery): The search request containing the query and parameters
+        deadline (Deadline): Deadline of the request
+        use_cache (bool): Answer from the semantic cache when possible
+        
+    Returns:
+        SearchResponse: The search results with metadata and Claude's analysis
+    """
+    retrieval = retrieve_search_results(search_request, deadline, use_cache)
+    if retrieval.cached is not None:
+        return retrieval.cached
+    return analyze_search_results(search_request, retrieval, deadline)
+
+# Answers for the curated questions, recomputed whenever the corpus changes (e.g. after an ingest)
+curated_answers = PrecomputedAnswers(
+    questions=load_curated_questions(os.getenv('CURATED_QUESTIONS_PATH', str(Path(__file__).parent / 'curated_questions.json'))),
+    # Always recompute from the corpus: the semantic cache may still hold pre-ingest answers when
+    # the warm-up notices a corpus change before the cache's own version check does
+    compute_fn=lambda question: run_semantic_search(SearchQuery(query=question), Deadline(REQUEST_TIMEOUT), use_cache=False),
+    key_fn=lambda question: search_key(SearchQuery(query=question)),
+    corpus_version_fn=semantic_client.corpus_version,
+    check_interval=float(os.getenv('CURATED_WARMUP_CHECK_INTERVAL', '60')),
+    is_valid_fn=lambda response: response.analysis not in (NO_ANALYSIS, ANALYSIS_PARSE_ERROR)
+)
+
+@app.get("/api/suggestions", response_model=SuggestionsResponse)
+async def suggestions():
+    """Return the curated questions suggested to users (answered ahead of time)"""
+    return SuggestionsResponse(questions=curated_answers.questions)
+
+@app.post("/api/search/batch", response_model=BatchSearchResponse)
+async def semantic_search_batch(batch_request: BatchSearchQuery):
+    """
+    Perform semantic search for many queries in one round trip (without Claude analysis).
+    
+    Args:
+        batch_request (BatchSearchQuery): The queries and shared search parameters
+        
+    Returns:
+        BatchSearchResponse: The search results for each query, in request order
+    """
+    deadline = Deadline(REQUEST_TIMEOUT)
+    async with batch_search_limiter.slot(deadline):
+        return await run_blocking(deadline, 'batch search', run_semantic_search_batch, batch_request, deadline)
+
+def run_semantic_search_batch(batch_request: BatchSearchQuery, deadline: Deadline) -> BatchSearchResponse:
+    """
+    Run a batch semantic search within the request deadline.
+    
+    Args:
+        batch_request (BatchSearchQuery): The queries and shared search parameters
+        deadline (Deadline): Deadline of the request
+        
+    Returns:
+        BatchSearchResponse: The search results for each query, in request order
+    """
+    try:
+        deadline.check('embed')
+        batch_results = semantic_client.search_similar_batch(
+            query_texts=batch_request.queries,
+            similarity_threshold=batch_request.similarity_threshold,
+            max_results=batch_request.max_results,
+            timeout=deadline.remaining()
+        )
+        deadline.check('db')
         
+        items = [
+            BatchSearchItem(
+                query=query,
+                results=[
+                    SearchResult(
+                        chunk_id=result['chunk_id'],
+                        chunk_text=result['chunk_text'],
+                        similarity=result['similarity'],
+                        metadata=result['metadata']
+                    )
+                    for result in results
+                ],
+                total_results=len(results)
+            )
+            for query, results in zip(batch_request.queries, batch_results)
+        ]
+        
+        return BatchSearchResponse(results=items, total_queries=len(items))
+        
+    except DeadlineExceeded:
+        raise
     except Exception as e:
+        if deadline.expired():
+            raise DeadlineExceeded('batch search') from e
         raise HTTPException(
             status_code=500,
-            detail=f"Error performing semantic search: {str(e)}"
+            detail=f"Error performing batch semantic search: {str(e)}"
         )
 
 @app.post("/api/ask")
@@ -144,24 +528,218 @@ async def ask_knowledge_base(query: KnowledgeBaseQuery):
     Args:
         query (KnowledgeBaseQuery): The query containing the question and parameters
         
+    Returns:
+        str: The complete response from the knowledge base
+    """
+    key = normalize_query(query.query)
+
+    # The chat sends the welcome page's sample questions here, so they are answered ahead of time too
+    precomputed = curated_ask_answers.get(key)
+    record_cache_lookup('precomputed', precomputed is not None)
+    if precomputed is not None:
+        return precomputed
+
+    async def execute():
+        deadline = Deadline(REQUEST_TIMEOUT)
+        async with ask_limiter.slot(deadline):
+            return await run_blocking(deadline, 'ask_your_pdf', run_ask_knowledge_base, query, deadline)
+
+    # AskYourPdf is always called with the same parameters, so the question alone identifies the call
+    return await ask_flights.do(key, execute)
+
+def run_ask_knowledge_base(query: KnowledgeBaseQuery, deadline: Deadline):
+    """
+    Query the knowledge base within the request deadline.
+    
+    Args:
+        query (KnowledgeBaseQuery): The query containing the question and parameters
+        deadline (Deadline): Deadline of the request
+        
     Returns:
         str: The complete response from the knowledge base
     """
     try:
-        response = ask_your_pdf_client.ask_knowledge_base(
-            query=query.query,
-            temperature=0.7,
-            language="ENGLISH",
-            length="SHORT"
-        )
+        deadline.check('ask_your_pdf')
+        with track_stage('ask_your_pdf'):
+            response = ask_your_pdf_client.ask_knowledge_base(
+                query=query.query,
+                temperature=0.7,
+                language="ENGLISH",
+                length="SHORT",
+                timeout=deadline.remaining()
+            )
         return response
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
+        if deadline.expired():
+            raise DeadlineExceeded('ask_your_pdf') from e
         raise HTTPException(
             status_code=500,
             detail=f"Error querying knowledge base: {str(e)}"
         )
 
+# AskYourPdf answers for the curated questions. The knowledge base lives outside our corpus, so
+# the answers are refreshed on a timer instead of on corpus changes
+curated_ask_answers = PrecomputedAnswers(
+    questions=curated_answers.questions,
+    compute_fn=lambda question: run_ask_knowledge_base(KnowledgeBaseQuery(query=question), Deadline(REQUEST_TIMEOUT)),
+    key_fn=normalize_query,
+    check_interval=float(os.getenv('CURATED_WARMUP_CHECK_INTERVAL', '60')),
+    is_valid_fn=lambda response: bool(isinstance(response, dict) and (response.get('answer') or {}).get('message')),
+    max_age=float(os.getenv('CURATED_ASK_MAX_AGE', '3600'))
+)
+
+# Uploaded PDFs are stored here and ingested by scripts/file_upload/ingest_worker.py,
+# so parsing and embedding never run on the API workers
+UPLOAD_DIR = Path(os.getenv('UPLOAD_DIR', str(Path(__file__).parent / 'uploads')))
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(100 * 1024 * 1024)))
+
+def job_response(job: Dict[str, Any]) -> IngestionJob:
+    """Convert an ingestion_jobs row to its API model."""
+    return IngestionJob(
+        job_id=job['id'],
+        filename=job['filename'],
+        status=job['status'],
+        total_chunks=job['total_chunks'],
+        processed_chunks=job['processed_chunks'],
+        error=job['error'],
+        created_at=job['created_at'],
+        started_at=job['started_at'],
+        finished_at=job['finished_at']
+    )
+
+@app.post("/api/documents", response_model=IngestionJob, status_code=202)
+async def upload_document(file: UploadFile = File(...)):
+    """
+    Upload a PDF and queue it for ingestion.
+    
+    Args:
+        file (UploadFile): The PDF document
+        
+    Returns:
+        IngestionJob: The queued job; poll /api/documents/jobs/{job_id} for progress
+    """
+    if not file.filename or Path(file.filename).suffix.lower() != '.pdf':
+        raise HTTPException(status_code=400, detail="Only PDF documents are supported")
+    return await run_in_threadpool(store_upload, file)
+
+def store_upload(file: UploadFile) -> IngestionJob:
+    """
+    Save an uploaded PDF to UPLOAD_DIR and create its ingestion job.
+
+    Uploads are identified by their SHA-256, so uploading the same document again returns the
+    existing job instead of ingesting (and storing its chunks) twice; a failed job is requeued.
+    
+    Args:
+        file (UploadFile): The PDF document
+        
+    Returns:
+        IngestionJob: The queued (or existing) job
+    """
+    # Keep the original file name (it ends up in the chunk metadata) inside a unique directory
+    filename = Path(file.filename).name
+    target = UPLOAD_DIR / uuid.uuid4().hex / filename
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        size = 0
+        content_hash = hashlib.sha256()
+        with open(target, 'wb') as out:
+            while data := file.file.read(1024 * 1024):
+                size += len(data)
+                if size > UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"File exceeds {UPLOAD_MAX_BYTES} bytes")
+                content_hash.update(data)
+                out.write(data)
+
+        with open(target, 'rb') as saved:
+            if saved.read(5) != b'%PDF-':
+                raise HTTPException(status_code=400, detail="File is not a valid PDF")
+
+        with PostgresClient(pooled=True) as db:
+            inserted = db.execute_query(
+                """
+                INSERT INTO ingestion_jobs (file_path, filename, content_hash) VALUES (%s, %s, %s)
+                ON CONFLICT (content_hash) DO NOTHING
+                RETURNING *
+                """,
+                (str(target.absolute()), filename, content_hash.hexdigest()),
+                fetch=True
+            )
+            if inserted:
+                return job_response(inserted[0])
+
+            # Already uploaded: keep the first copy, so a retried job resumes from its checkpoints
+            job = db.execute_query(
+                "SELECT * FROM ingestion_jobs WHERE content_hash = %s", (content_hash.hexdigest(),)
+            )[0]
+            existing = Path(job['file_path'])
+            if existing.exists():
+                target.unlink()
+                target.parent.rmdir()
+            else:
+                existing.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(target, existing)
+                target.parent.rmdir()
+            if job['status'] == 'failed':
+                job = db.execute_query(
+                    """
+                    UPDATE ingestion_jobs
+                    SET status = 'queued', attempts = 0, error = NULL, started_at = NULL, finished_at = NULL,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = %s
+                    RETURNING *
+                    """,
+                    (job['id'],),
+                    fetch=True
+                )[0]
+        return job_response(job)
+
+    except HTTPException:
+        # Idempotent: the duplicate branch may already have removed the directory
+        shutil.rmtree(target.parent, ignore_errors=True)
+        raise
+    except Exception as e:
+        shutil.rmtree(target.parent, ignore_errors=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error queuing document: {str(e)}"
+        )
+
+@app.get("/api/documents/jobs/{job_id}", response_model=IngestionJob)
+async def get_ingestion_job(job_id: int):
+    """
+    Get the status and progress of an ingestion job.
+    
+    Args:
+        job_id (int): ID returned by the upload endpoint
+        
+    Returns:
+        IngestionJob: The job status
+    """
+    def fetch_job():
+        with PostgresClient(pooled=True) as db:
+            return db.execute_query("SELECT * FROM ingestion_jobs WHERE id = %s", (job_id,))
+
+    try:
+        jobs = await run_in_threadpool(fetch_job)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching ingestion job: {str(e)}"
+        )
+    if not jobs:
+        raise HTTPException(status_code=404, detail=f"Ingestion job {job_id} not found")
+    return job_response(jobs[0])
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose Prometheus metrics for scraping"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
 @app.get("/")
 async def root():
     """Root endpoint returning API information"""
@@ -0,0 +1,371 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, Future, wait
+from typing import List, Dict, Optional, Tuple, Any
+from sentence_transformers import SentenceTransformer
+
+from file_upload import chunk_document, pad_embeddings, insert_chunks, PostgresClient
+
+# Per-process state of the worker pool, set up once by init_worker
+_worker_model: Optional[SentenceTransformer] = None
+_worker_db: Optional[PostgresClient] = None
+
+def discover_documents(source: str) -> List[Path]:
+    """
+    Resolve the documents to ingest from a directory or a manifest file.
+
+    A directory is searched recursively for PDFs. A manifest is either a JSON list of paths or a
+    text file with one path per line (blank lines and lines starting with # are ignored); relative
+    paths are resolved against the manifest's directory.
+
+    Args:
+        source (str): Directory or manifest path
+
+    Returns:
+        List[Path]: Absolute document paths
+    """
+    source_path = Path(source)
+    if not source_path.exists():
+        raise FileNotFoundError(f"Source not found: {source}")
+
+    if source_path.is_dir():
+        return sorted(p.absolute() for p in source_path.rglob('*') if p.is_file() and p.suffix.lower() == '.pdf')
+
+    content = source_path.read_text(encoding='utf-8')
+    if source_path.suffix.lower() == '.json':
+        entries = json.loads(content)
+    else:
+        entries = [line.strip() for line in content.splitlines() if line.strip() and not line.strip().startswith('#')]
+
+    paths = []
+    for entry in entries:
+        path = Path(entry)
+        if not path.is_absolute():
+            path = source_path.parent / path
+        if not path.exists():
+            raise FileNotFoundError(f"Document listed in manifest not found: {entry}")
+        paths.append(path.absolute())
+    return paths
+
+def reset_document(db: PostgresClient, document_id: int, file_path: Path, options: Dict[str, Any]) -> None:
+    """
+    Remove every chunk and checkpoint stored for a document so it is ingested from scratch.
+
+    Args:
+        db (PostgresClient): Connected PostgreSQL client
+        document_id (int): ID of the ingestion_documents row
+        file_path (Path): Absolute document path
+        options (Dict[str, Any]): Options the document will be ingested with
+    """
+    stat = file_path.stat()
+    with db.transaction():
+        db.execute_query("DELETE FROM chunks WHERE metadata->>'source_file_path' = %s", (str(file_path),))
+        db.execute_query("DELETE FROM ingestion_batches WHERE document_id = %s", (document_id,))
+        db.execute_query(
+            """
+            UPDATE ingestion_documents
+            SET status = 'pending', options = %s::jsonb, file_size = %s, modified_time = %s,
+                total_chunks = NULL, total_batches = NULL, error = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            """,
+            (json.dumps(options), stat.st_size, stat.st_mtime, document_id)
+        )
+
+def register_document(db: PostgresClient, file_path: Path, options: Dict[str, Any], restart: bool = False) -> Optional[int]:
+    """
+    Register a document for ingestion and decide whether it can resume from its checkpoints.
+
+    Documents that are already done (and unchanged) are skipped. A new, modified or restarted
+    document, or one whose checkpoints were built with different options, starts over and
+    replaces any chunks previously stored for the same file path.
+
+    Args:
+        db (PostgresClient): Connected PostgreSQL client
+        file_path (Path): Absolute document path
+        options (Dict[str, Any]): Chunking and batching options
+        restart (bool): Discard existing progress
+
+    Returns:
+        Optional[int]: ID of the ingestion_documents row, or None if there is nothing to do
+    """
+    stat = file_path.stat()
+    inserted = db.execute_query(
+        """
+        INSERT INTO ingestion_documents (file_path, file_size, modified_time, options)
+        VALUES (%s, %s, %s, %s::jsonb)
+        ON CONFLICT (file_path) DO NOTHING
+        RETURNING id
+        """,
+        (str(file_path), stat.st_size, stat.st_mtime, json.dumps(options)),
+        fetch=True
+    )
+    if inserted:
+        reset_document(db, inserted[0]['id'], file_path, options)
+        return inserted[0]['id']
+
+    document = db.execute_query("SELECT * FROM ingestion_documents WHERE file_path = %s", (str(file_path),))[0]
+    unchanged = (
+        document['file_size'] == stat.st_size
+        and document['modified_time'] == stat.st_mtime
+        and document['options'] == options
+    )
+    if unchanged and not restart:
+        if document['status'] == 'done':
+            print(f"Skipping {file_path.name}: already ingested")
+            return None
+        print(f"Resuming {file_path.name}")
+        return document['id']
+
+    reset_document(db, document['id'], file_path, options)
+    return document['id']
+
+def update_document(db: PostgresClient, document_id: int, status: str, **fields) -> None:
+    """
+    Update the status (and optionally other columns) of an ingestion document.
+
+    Args:
+        db (PostgresClient): Connected PostgreSQL client
+        document_id (int): ID of the ingestion_documents row
+        status (str): New status
+        **fields: Extra columns to set (total_chunks, total_batches, error)
+    """
+    assignments = ', '.join(f"{name} = %s" for name in fields)
+    db.execute_query(
+        f"UPDATE ingestion_documents SET status = %s, {assignments + ', ' if assignments else ''}updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+        (status, *fields.values(), document_id)
+    )
+
+def init_worker(model_name: str, torch_threads: int) -> None:
+    """
+    Load the embedding model and open a database connection once per worker process.
+
+    Args:
+        model_name (str): Name of the sentence-transformers model to use
+        torch_threads (int): Number of threads torch may use in this process
+    """
+    global _worker_model, _worker_db
+    import torch
+    torch.set_num_threads(torch_threads)
+    _worker_model = SentenceTransformer(model_name)
+    _worker_db = PostgresClient()
+
+def prepare_document_task(document_id: int, file_path: str, options: Dict[str, Any]) -> Tuple[int, List[str], List[Dict[str, any]]]:
+    """
+    Worker task: extract and chunk one document.
+
+    Returns:
+        Tuple[int, List[str], List[Dict[str, any]]]: Document ID, chunks and chunk metadata
+    """
+    chunks, chunks_metadata = chunk_document(
+        Path(file_path),
+        _worker_model,
+        chunk_size=options['chunk_size'],
+        overlap=options['overlap'],
+        chunking=options['chunking'],
+        max_tokens=options['max_tokens'],
+        overlap_tokens=options['overlap_tokens']
+    )
+    return document_id, chunks, chunks_metadata
+
+def store_batch_task(document_id: int, batch_index: int, chunks: List[str], chunks_metadata: List[Dict[str, any]]) -> Tuple[int, int, int]:
+    """
+    Worker task: embed one batch of chunks and commit it together with its checkpoint.
+
+    The checkpoint row is claimed first inside the same transaction, so a batch that was already
+    committed (e.g. by a previous run) is never inserted twice.
+
+    Returns:
+        Tuple[int, int, int]: Document ID, batch index and number of chunks written
+    """
+    embeddings = pad_embeddings(_worker_model.encode(chunks, show_progress_bar=False))
+    with _worker_db.transaction():
+        claimed = _worker_db.execute_query(
+            """
+            INSERT INTO ingestion_batches (document_id, batch_index, chunk_count)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (document_id, batch_index) DO NOTHING
+            RETURNING batch_index
+            """,
+            (document_id, batch_index, len(chunks)),
+            fetch=True
+        )
+        if not claimed:
+            return document_id, batch_index, 0
+        insert_chunks(_worker_db, chunks, chunks_metadata, embeddings)
+    return document_id, batch_index, len(chunks)
+
+def run_batch_ingest(paths: List[Path], options: Dict[str, Any], workers: int, torch_threads: int,
+                     restart: bool = False) -> Dict[str, int]:
+    """
+    Ingest many documents in parallel with resumable per-batch checkpoints.
+
+    Documents are chunked by worker processes, and their chunks are split into fixed batches that
+    are embedded and committed by whichever worker is free, so large documents share the
+    embedding work across all processes. Batches already recorded in ingestion_batches are
+    skipped, which makes a crashed run resumable.
+
+    Args:
+        paths (List[Path]): Absolute document paths
+        options (Dict[str, Any]): Chunking and batching options (see build_options)
+        workers (int): Number of worker processes
+        torch_threads (int): Number of torch threads per worker
+        restart (bool): Discard existing progress for every document
+
+    Returns:
+        Dict[str, int]: Counts of documents done, skipped and failed, and chunks written
+    """
+    db = PostgresClient()
+    db.connect()
+    summary = {'done': 0, 'skipped': 0, 'failed': 0, 'chunks': 0}
+
+    try:
+        pending_documents = deque()
+        for path in paths:
+            document_id = register_document(db, path, options, restart)
+            if document_id is None:
+                summary['skipped'] += 1
+            else:
+                pending_documents.append((document_id, path))
+
+        if not pending_documents:
+            print("Nothing to ingest")
+            return summary
+
+        print(f"Ingesting {len(pending_documents)} documents with {workers} workers ({torch_threads} torch threads each)")
+        ready_batches = deque()  # (document_id, batch_index, chunks, metadata)
+        remaining: Dict[int, int] = {}  # Outstanding batches per document
+        names: Dict[int, str] = {document_id: path.name for document_id, path in pending_documents}
+        futures: Dict[Future, Tuple[str, int]] = {}
+        max_in_flight = workers * 2
+
+        def fail(document_id: int, error: Exception):
+            print(f"❌ Failed to ingest {names[document_id]}: {error}")
+            update_document(db, document_id, 'failed', error=str(error))
+            remaining.pop(document_id, None)
+            for batch in [b for b in ready_batches if b[0] == document_id]:
+                ready_batches.remove(batch)
+            summary['failed'] += 1
+
+        def finish(document_id: int):
+            update_document(db, document_id, 'done')
+            remaining.pop(document_id)
+            summary['done'] += 1
+            print(f"✅ Ingested {names[document_id]}")
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(options['model_name'], torch_threads)) as pool:
+            while pending_documents or ready_batches or futures:
+                # Prefer embedding work over opening new documents to keep memory bounded
+                while len(futures) < max_in_flight:
+                    if ready_batches:
+                        document_id, batch_index, chunks, chunks_metadata = ready_batches.popleft()
+                        future = pool.submit(store_batch_task, document_id, batch_index, chunks, chunks_metadata)
+                        futures[future] = ('batch', document_id)
+                    elif pending_documents and sum(kind == 'prepare' for kind, _ in futures.values()) < workers:
+                        document_id, path = pending_documents.popleft()
+                        update_document(db, document_id, 'processing')
+                        future = pool.submit(prepare_document_task, document_id, str(path), options)
+                        futures[future] = ('prepare', document_id)
+                    else:
+                        break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, document_id = futures.pop(future)
+                    # Batches of a document that already failed are only counted
+                    already_failed = kind == 'batch' and document_id not in remaining
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if not already_failed:
+                            fail(document_id, e)
+                        continue
+                    if already_failed:
+                        summary['chunks'] += result[2]
+                        continue
+
+                    if kind == 'prepare':
+                        _, chunks, chunks_metadata = result
+                        batch_size = options['batch_size']
+                        total_batches = math.ceil(len(chunks) / batch_size)
+                        committed = {
+                            row['batch_index'] for row in db.execute_query(
+                                "SELECT batch_index FROM ingestion_batches WHERE document_id = %s", (document_id,)
+                            )
+                        }
+                        update_document(db, document_id, 'processing', total_chunks=len(chunks), total_batches=total_batches)
+                        missing = [i for i in range(total_batches) if i not in committed]
+                        print(f"{names[document_id]}: {len(chunks)} chunks, {total_batches} batches ({len(committed)} already committed)")
+                        remaining[document_id] = len(missing)
+                        for batch_index in missing:
+                            start = batch_index * batch_size
+                            ready_batches.append((document_id, batch_index, chunks[start:start + batch_size],
+                                                  chunks_metadata[start:start + batch_size]))
+                        if not missing:
+                            finish(document_id)
+                    else:
+                        summary['chunks'] += result[2]
+                        remaining[document_id] -= 1
+                        if remaining[document_id] == 0:
+                            finish(document_id)
+    finally:
+        db.disconnect()
+
+    return summary
+
+def build_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """Collect the options that determine chunk boundaries and batches (stored per document)."""
+    return {
+        'chunking': args.chunking,
+        'chunk_size': args.chunk_size,
+        'overlap': args.overlap,
+        'max_tokens': args.max_tokens,
+        'overlap_tokens': args.overlap_tokens,
+        'batch_size': args.batch_size,
+        'model_name': args.model_name
+    }
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Ingest a directory or manifest of PDFs with parallel workers and resumable checkpoints.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+    """
+    paths = discover_documents(args.source)
+    print(f"Found {len(paths)} documents")
+
+    cpu_count = os.cpu_count() or 1
+    workers = args.workers or max(1, min(4, cpu_count))
+    torch_threads = args.torch_threads or max(1, cpu_count // workers)
+
+    started = time.perf_counter()
+    summary = run_batch_ingest(paths, build_options(args), workers, torch_threads, args.restart)
+    elapsed = time.perf_counter() - started
+
+    print(f"\nFinished in {elapsed:.1f}s: {summary['done']} done, {summary['skipped']} skipped, "
+          f"{summary['failed']} failed, {summary['chunks']} chunks written")
+    if summary['failed']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Ingest many PDFs in parallel with resumable checkpoints')
+    parser.add_argument('--source', type=str, required=True, help='Directory of PDFs, or a manifest (.json list or one path per line)')
+    parser.add_argument('--workers', type=int, help='Number of worker processes (default: up to 4)')
+    parser.add_argument('--torch_threads', type=int, help='Torch threads per worker (default: cores / workers)')
+    parser.add_argument('--batch_size', type=int, default=64, help='Number of chunks per committed batch')
+    parser.add_argument('--chunking', type=str, choices=['chars', 'structured'], default='chars', help='Chunking mode')
+    parser.add_argument('--chunk_size', type=int, default=1000, help='Size of text chunks in characters (chars chunking)')
+    parser.add_argument('--overlap', type=int, default=500, help='Overlap between chunks in characters (chars chunking)')
+    parser.add_argument('--max_tokens', type=int, default=400, help='Maximum tokens per chunk (structured chunking)')
+    parser.add_argument('--overlap_tokens', type=int, default=40, help='Maximum tokens repeated between chunks (structured chunking)')
+    parser.add_argument('--model_name', type=str, default='BAAI/bge-large-en-v1.5', help='Sentence-transformers model to use')
+    parser.add_argument('--restart', action='store_true', help='Discard existing progress and ingest every document from scratch')
+
+    main(parser.parse_args())
@@ -1,7 +1,7 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-import psycopg2
+import psycopg
 import sys
 
 # Add the server directory to Python path so we can import the postgres client
@@ -19,10 +19,10 @@ def create_schema():
         schema_sql = f.read()
     
     # Connect to PostgreSQL
-    conn = psycopg2.connect(
+    conn = psycopg.connect(
         host=os.getenv('POSTGRES_HOST', 'localhost'),
         port=int(os.getenv('POSTGRES_PORT', '5432')),
-        database=os.getenv('POSTGRES_DB', 'aviaite'),
+        dbname=os.getenv('POSTGRES_DB', 'aviaite'),
         user=os.getenv('POSTGRES_USER', 'postgres'),
         password=os.getenv('POSTGRES_PASSWORD', 'postgres')
     )
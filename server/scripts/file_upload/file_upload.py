@@ -5,12 +5,12 @@ from dotenv import load_dotenv
 import argparse
 import PyPDF2
 import re
-import json
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple, Any
 import mimetypes
 from dataclasses import dataclass
 import numpy as np
 from sentence_transformers import SentenceTransformer
+from psycopg.types.json import Jsonb
 
 # Add the server directory to Python path so we can import the postgres client
 server_dir = Path(__file__).resolve().parents[2]
@@ -169,6 +169,70 @@ def get_page_info_for_chunk(start_char: int, end_char: int, page_info: List[Dict
         'spans_multiple_pages': len(chunk_pages) > 1
     }
 
+def find_chunk_end(text: str, start: int, chunk_size: int, overlap: int) -> int:
+    """
+    Find where a chunk starting at `start` ends, preferring a sentence boundary in the overlap region.
+    
+    Args:
+        text (str): Text being chunked
+        start (int): Start character position of the chunk
+        chunk_size (int): Maximum size of each chunk
+        overlap (int): Number of characters to overlap between chunks
+        
+    Returns:
+        int: End character position (exclusive) of the chunk
+    """
+    end = start + chunk_size
+    
+    # If this is not the last chunk, try to break at a sentence boundary
+    if end < len(text):
+        # Look for sentence boundaries (., !, ?) within the overlap region
+        overlap_start = end - overlap
+        overlap_text = text[overlap_start:end]
+        
+        # Find the last sentence boundary in the overlap region
+        matches = list(re.finditer(r'[.!?]\s', overlap_text))
+        if matches:
+            # Adjust end to the last sentence boundary found
+            last_match = matches[-1]
+            end = overlap_start + last_match.end()
+    
+    return end
+
+def build_chunk_metadata(chunk_text: str, chunk_index: int, start: int, end: int, is_last_chunk: bool,
+                         page_info: List[Dict[str, any]]) -> Dict[str, any]:
+    """
+    Build the metadata stored with a character-based chunk.
+    
+    Args:
+        chunk_text (str): Text of the chunk
+        chunk_index (int): Position of the chunk in the document
+        start (int): Start character position of the chunk
+        end (int): End character position of the chunk
+        is_last_chunk (bool): Whether this is the last chunk of the document
+        page_info (List[Dict[str, any]]): List of page information dictionaries
+        
+    Returns:
+        Dict[str, any]: Chunk metadata
+    """
+    # Get page information for this chunk
+    page_info_for_chunk = get_page_info_for_chunk(start, end, page_info)
+    
+    return {
+        'chunk_index': chunk_index,
+        'start_char': start,
+        'end_char': end,
+        'chunk_size': len(chunk_text),
+        'num_sentences': len(re.findall(r'[.!?]\s', chunk_text)) + 1,
+        'num_words': len(chunk_text.split()),
+        'is_first_chunk': chunk_index == 0,
+        'is_last_chunk': is_last_chunk,
+        # Add page information
+        'pages': page_info_for_chunk['pages'],
+        'page_ranges': page_info_for_chunk['page_ranges'],
+        'spans_multiple_pages': page_info_for_chunk['spans_multiple_pages']
+    }
+
 def chunk_text(text: str, page_info: List[Dict[str, any]], chunk_size: int = 1000, overlap: int = 100) -> tuple[List[str], List[Dict[str, any]]]:
     """
     Split text into overlapping chunks and generate metadata for each chunk.
@@ -192,42 +256,13 @@ def chunk_text(text: str, page_info: List[Dict[str, any]], chunk_size: int = 100
 
     while start < text_length:
         # Find the end of the chunk
-        end = start + chunk_size
-        
-        # If this is not the last chunk, try to break at a sentence boundary
-        if end < text_length:
-            # Look for sentence boundaries (., !, ?) within the overlap region
-            overlap_start = end - overlap
-            overlap_text = text[overlap_start:end]
-            
-            # Find the last sentence boundary in the overlap region
-            matches = list(re.finditer(r'[.!?]\s', overlap_text))
-            if matches:
-                # Adjust end to the last sentence boundary found
-                last_match = matches[-1]
-                end = overlap_start + last_match.end()
+        end = find_chunk_end(text, start, chunk_size, overlap)
         
         # Get the chunk text
         chunk_text = text[start:end].strip()
         
-        # Get page information for this chunk
-        page_info_for_chunk = get_page_info_for_chunk(start, end, page_info)
-        
         # Create metadata for this chunk
-        chunk_metadata = {
-            'chunk_index': chunk_index,
-            'start_char': start,
-            'end_char': end,
-            'chunk_size': len(chunk_text),
-            'num_sentences': len(re.findall(r'[.!?]\s', chunk_text)) + 1,
-            'num_words': len(chunk_text.split()),
-            'is_first_chunk': chunk_index == 0,
-            'is_last_chunk': end >= text_length,
-            # Add page information
-            'pages': page_info_for_chunk['pages'],
-            'page_ranges': page_info_for_chunk['page_ranges'],
-            'spans_multiple_pages': page_info_for_chunk['spans_multiple_pages']
-        }
+        chunk_metadata = build_chunk_metadata(chunk_text, chunk_index, start, end, end >= text_length, page_info)
         
         # Add to our lists
         chunks.append(chunk_text)
@@ -239,6 +274,324 @@ def chunk_text(text: str, page_info: List[Dict[str, any]], chunk_size: int = 100
     
     return chunks, chunks_metadata
 
+# Patterns used by the structure-aware chunker. Headings start a new section; numbered
+# paragraphs and list items start a new unit that is never split across chunks if it fits.
+HEADING_PATTERNS = [
+    re.compile(r'^(CHAPTER|Chapter|SECTION|Section|PART|Part|APPENDIX|Appendix|ATTACHMENT|Attachment)\s+[\w.-]+'),
+    re.compile(r'^\d+(\.\d+)*\.?\s+[A-Z][A-Za-z0-9 ,/&()-]{0,60}$'),
+    re.compile(r'^[A-Z][A-Z0-9 ,/&()-]{3,80}$'),
+]
+PARAGRAPH_START_PATTERN = re.compile(r'^(\d+(\.\d+)+\.?|\(?[a-z]\)|\(?[ivx]+\)|[-])\s+')
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+def clean_line(line: str) -> str:
+    """
+    Clean a single line of text the same way clean_text does, without joining lines.
+    
+    Args:
+        line (str): Raw line
+        
+    Returns:
+        str: Cleaned line
+    """
+    line = re.sub(r'\s+', ' ', line)
+    line = re.sub(r'[^\w\s.,!?-]', '', line)
+    return line.strip()
+
+def clean_pages(text: str, page_info: List[Dict[str, any]]) -> Tuple[str, List[Dict[str, any]]]:
+    """
+    Clean text page by page, keeping line breaks and page offsets consistent with the cleaned text.
+    
+    Args:
+        text (str): Raw text as returned by extract_text_from_pdf
+        page_info (List[Dict[str, any]]): Page information for the raw text
+        
+    Returns:
+        Tuple[str, List[Dict[str, any]]]: Tuple containing:
+            - Cleaned text with one line per source line
+            - Page information with offsets into the cleaned text
+    """
+    cleaned_pages = []
+    cleaned_page_info = []
+    position = 0
+    
+    for page in page_info:
+        lines = [clean_line(line) for line in text[page['start_char']:page['end_char']].splitlines()]
+        page_text = '\n'.join(line for line in lines if line)
+        if not page_text:
+            continue
+        
+        cleaned_page_info.append({
+            **page,
+            'start_char': position,
+            'end_char': position + len(page_text),
+            'page_text_length': len(page_text)
+        })
+        cleaned_pages.append(page_text)
+        position += len(page_text) + 1
+    
+    return '\n'.join(cleaned_pages), cleaned_page_info
+
+def is_heading(line: str) -> bool:
+    """Check whether a cleaned line looks like a section heading."""
+    # Long lines are wrapped paragraph text even when they start like a heading
+    if len(line.split()) > 10:
+        return False
+    return any(pattern.match(line) for pattern in HEADING_PATTERNS)
+
+def iter_lines(text: str, offset: int = 0) -> Iterator[Tuple[int, str]]:
+    """
+    Iterate over the lines of line-preserving text together with their start offsets.
+    
+    Args:
+        text (str): Cleaned text from clean_pages
+        offset (int): Offset of the text within the whole document
+        
+    Yields:
+        Tuple[int, str]: Start offset and content of each line
+    """
+    position = offset
+    for line in text.split('\n'):
+        yield position, line
+        position += len(line) + 1
+
+def iter_units(lines: Iterable[Tuple[int, str]]) -> Iterator[Dict[str, any]]:
+    """
+    Group lines into structural units (headings, numbered paragraphs, running text) as they arrive.
+    
+    A unit is yielded once the line that starts the next unit has been seen, so lines can be
+    streamed page by page.
+    
+    Args:
+        lines (Iterable[Tuple[int, str]]): Start offset and content of each line, in order
+        
+    Yields:
+        Dict[str, any]: Units with start_char, end_char, section index and section title
+    """
+    section_index = 0
+    section_title = None
+    unit = None
+    
+    for line_start, line in lines:
+        line_end = line_start + len(line)
+        if not line:
+            continue
+        
+        if is_heading(line):
+            if unit is not None:
+                yield unit
+            section_index += 1
+            section_title = line
+            # The heading is kept as its own unit so it leads the first chunk of its section
+            yield {
+                'start_char': line_start,
+                'end_char': line_end,
+                'section_index': section_index,
+                'section_title': section_title
+            }
+            unit = None
+        elif unit is None or PARAGRAPH_START_PATTERN.match(line):
+            if unit is not None:
+                yield unit
+            unit = {
+                'start_char': line_start,
+                'end_char': line_end,
+                'section_index': section_index,
+                'section_title': section_title
+            }
+        else:
+            unit['end_char'] = line_end
+    if unit is not None:
+        yield unit
+
+def split_into_units(text: str) -> List[Dict[str, any]]:
+    """
+    Split line-preserving text into structural units (headings, numbered paragraphs, running text).
+    
+    Args:
+        text (str): Cleaned text from clean_pages
+        
+    Returns:
+        List[Dict[str, any]]: Units with start_char, end_char, section index and section title
+    """
+    return list(iter_units(iter_lines(text)))
+
+def split_oversized_unit(text: str, unit: Dict[str, any], tokenizer, max_tokens: int) -> List[Dict[str, any]]:
+    """
+    Split a unit that exceeds the token limit at sentence boundaries, or at token boundaries
+    for single sentences that are still too long.
+    
+    Args:
+        text (str): Text the unit offsets refer to
+        unit (Dict[str, any]): Unit to split
+        tokenizer: Hugging Face tokenizer of the embedding model
+        max_tokens (int): Maximum number of tokens per piece
+        
+    Returns:
+        List[Dict[str, any]]: Pieces with start_char, end_char and num_tokens
+    """
+    unit_text = text[unit['start_char']:unit['end_char']]
+    sentence_bounds = []
+    sentence_start = 0
+    for match in SENTENCE_BOUNDARY_PATTERN.finditer(unit_text):
+        sentence_bounds.append((sentence_start, match.start()))
+        sentence_start = match.end()
+    sentence_bounds.append((sentence_start, len(unit_text)))
+    
+    pieces = []
+    for start, end in sentence_bounds:
+        encoding = tokenizer(unit_text[start:end], add_special_tokens=False, return_offsets_mapping=True)
+        offsets = encoding['offset_mapping']
+        for window_start in range(0, max(len(offsets), 1), max_tokens):
+            window = offsets[window_start:window_start + max_tokens]
+            piece_start = start + (window[0][0] if window else 0)
+            piece_end = start + (window[-1][1] if window else end - start)
+            pieces.append({
+                **unit,
+                'start_char': unit['start_char'] + piece_start,
+                'end_char': unit['start_char'] + piece_end,
+                'num_tokens': len(window)
+            })
+    return pieces
+
+def chunk_text_structured(text: str, page_info: List[Dict[str, any]], tokenizer, max_tokens: int = 400,
+                          overlap_tokens: int = 40, min_tokens: int = 100) -> tuple[List[str], List[Dict[str, any]]]:
+    """
+    Split text into chunks along section and paragraph structure, measuring size in model tokens.
+    
+    Units (headings, numbered paragraphs, running text) are packed greedily up to max_tokens.
+    A chunk is closed at a section boundary once it holds at least min_tokens, and up to
+    overlap_tokens worth of trailing units are repeated at the start of the next chunk of the
+    same section. The returned metadata has the same keys as chunk_text, plus num_tokens and
+    section_title.
+    
+    Args:
+        text (str): Line-preserving cleaned text from clean_pages
+        page_info (List[Dict[str, any]]): Page information with offsets into the cleaned text
+        tokenizer: Hugging Face tokenizer of the embedding model
+        max_tokens (int): Maximum number of tokens per chunk (excluding special tokens)
+        overlap_tokens (int): Maximum number of tokens repeated between consecutive chunks
+        min_tokens (int): Minimum chunk size before a section boundary closes a chunk
+        
+    Returns:
+        tuple[List[str], List[Dict[str, any]]]: Tuple containing:
+            - List of text chunks
+            - List of metadata dictionaries for each chunk
+    """
+    units = split_into_units(text)
+    if not units:
+        return [], []
+    
+    groups = list(pack_units(size_units(text, units, tokenizer, max_tokens), max_tokens, overlap_tokens, min_tokens))
+    
+    chunks = []
+    chunks_metadata = []
+    for chunk_index, group in enumerate(groups):
+        chunk, chunk_metadata = build_structured_chunk(text, group, chunk_index, chunk_index == len(groups) - 1, page_info)
+        chunks.append(chunk)
+        chunks_metadata.append(chunk_metadata)
+    
+    return chunks, chunks_metadata
+
+def size_units(text: str, units: List[Dict[str, any]], tokenizer, max_tokens: int) -> List[Dict[str, any]]:
+    """
+    Count the tokens of each unit, splitting units that exceed max_tokens.
+    
+    Args:
+        text (str): Text the unit offsets refer to
+        units (List[Dict[str, any]]): Units from iter_units
+        tokenizer: Hugging Face tokenizer of the embedding model
+        max_tokens (int): Maximum number of tokens per unit
+        
+    Returns:
+        List[Dict[str, any]]: Units (or pieces of units) with num_tokens
+    """
+    token_counts = [
+        len(ids) for ids in tokenizer(
+            [text[u['start_char']:u['end_char']] for u in units], add_special_tokens=False
+        )['input_ids']
+    ]
+    sized_units = []
+    for unit, num_tokens in zip(units, token_counts):
+        if num_tokens > max_tokens:
+            sized_units.extend(split_oversized_unit(text, unit, tokenizer, max_tokens))
+        else:
+            sized_units.append({**unit, 'num_tokens': num_tokens})
+    return sized_units
+
+def pack_units(sized_units: Iterable[Dict[str, any]], max_tokens: int, overlap_tokens: int,
+               min_tokens: int) -> Iterator[List[Dict[str, any]]]:
+    """
+    Pack sized units greedily into groups of at most max_tokens (see chunk_text_structured).
+    
+    Args:
+        sized_units (Iterable[Dict[str, any]]): Units with num_tokens, in document order
+        max_tokens (int): Maximum number of tokens per group
+        overlap_tokens (int): Maximum number of tokens repeated between consecutive groups
+        min_tokens (int): Minimum group size before a section boundary closes a group
+        
+    Yields:
+        List[Dict[str, any]]: The units of each chunk
+    """
+    current = []
+    current_tokens = 0
+    for unit in sized_units:
+        new_section = bool(current) and unit['section_index'] != current[-1]['section_index']
+        if current and (current_tokens + unit['num_tokens'] > max_tokens or (new_section and current_tokens >= min_tokens)):
+            yield current
+            # Carry trailing units over as overlap, but never across a section boundary
+            carried = []
+            carried_tokens = 0
+            if not new_section:
+                for previous in reversed(current):
+                    if carried_tokens + previous['num_tokens'] > overlap_tokens or len(carried) + 1 >= len(current):
+                        break
+                    carried.insert(0, previous)
+                    carried_tokens += previous['num_tokens']
+            if carried_tokens + unit['num_tokens'] > max_tokens:
+                carried, carried_tokens = [], 0
+            current, current_tokens = carried, carried_tokens
+        current.append(unit)
+        current_tokens += unit['num_tokens']
+    if current:
+        yield current
+
+def build_structured_chunk(text: str, group: List[Dict[str, any]], chunk_index: int, is_last_chunk: bool,
+                           page_info: List[Dict[str, any]]) -> Tuple[str, Dict[str, any]]:
+    """
+    Build the text and metadata of a structured chunk from its units.
+    
+    Args:
+        text (str): Text the unit offsets refer to
+        group (List[Dict[str, any]]): Units of the chunk (from pack_units)
+        chunk_index (int): Index of the chunk in the document
+        is_last_chunk (bool): Whether this is the last chunk of the document
+        page_info (List[Dict[str, any]]): Page information with offsets into the cleaned text
+        
+    Returns:
+        Tuple[str, Dict[str, any]]: Chunk text and chunk metadata
+    """
+    start, end = group[0]['start_char'], group[-1]['end_char']
+    # Line breaks become spaces, which keeps offsets valid and matches the chars mode format
+    chunk = text[start:end].replace('\n', ' ')
+    page_info_for_chunk = get_page_info_for_chunk(start, end, page_info)
+    
+    return chunk, {
+        'chunk_index': chunk_index,
+        'start_char': start,
+        'end_char': end,
+        'chunk_size': len(chunk),
+        'num_sentences': len(re.findall(r'[.!?]\s', chunk)) + 1,
+        'num_words': len(chunk.split()),
+        'num_tokens': sum(unit['num_tokens'] for unit in group),
+        'section_title': group[-1]['section_title'],
+        'is_first_chunk': chunk_index == 0,
+        'is_last_chunk': is_last_chunk,
+        'pages': page_info_for_chunk['pages'],
+        'page_ranges': page_info_for_chunk['page_ranges'],
+        'spans_multiple_pages': page_info_for_chunk['spans_multiple_pages']
+    }
+
 def extract_metadata(file_path: Path) -> Dict[str, any]:
     """
     Extract metadata from the file.
@@ -275,7 +628,8 @@ def extract_metadata(file_path: Path) -> Dict[str, any]:
     
     return metadata
 
-def generate_embeddings(chunks: List[str], model_name: str = 'BAAI/bge-large-en-v1.5') -> List[np.ndarray]:
+def generate_embeddings(chunks: List[str], model_name: str = 'BAAI/bge-large-en-v1.5',
+                        model: Optional[SentenceTransformer] = None) -> List[np.ndarray]:
     """
     Generate embeddings for text chunks using sentence-transformers.
     The BAAI/bge-large-en-v1.5 model produces 1024-dimensional embeddings,
@@ -284,38 +638,88 @@ def generate_embeddings(chunks: List[str], model_name: str = 'BAAI/bge-large-en-
     Args:
         chunks (List[str]): List of text chunks to embed
         model_name (str): Name of the sentence-transformers model to use
+        model (SentenceTransformer, optional): Already loaded model to reuse
         
     Returns:
         List[np.ndarray]: List of embeddings as numpy arrays with 1536 dimensions
     """
-    model = SentenceTransformer(model_name)
+    model = model or SentenceTransformer(model_name)
+    
+    # The model silently truncates inputs longer than its sequence limit, so report it
+    truncated = count_truncated_chunks(model, chunks)
+    if truncated:
+        print(f"Warning: {truncated} of {len(chunks)} chunks exceed the model limit of {model.max_seq_length} tokens and will be truncated")
+    
     embeddings = model.encode(chunks, show_progress_bar=True)
     
-    # Pad embeddings from 1024 to 1536 dimensions
+    return pad_embeddings(embeddings)
+
+def count_truncated_chunks(model: SentenceTransformer, chunks: List[str]) -> int:
+    """
+    Count the chunks that exceed the model's sequence limit (the model silently truncates them).
+    
+    Args:
+        model (SentenceTransformer): Embedding model
+        chunks (List[str]): Text chunks about to be embedded
+        
+    Returns:
+        int: Number of chunks that will be truncated
+    """
+    lengths = [len(ids) for ids in model.tokenizer(chunks, add_special_tokens=True)['input_ids']]
+    return sum(1 for length in lengths if length > model.max_seq_length)
+
+def pad_embeddings(embeddings: np.ndarray, embedding_dim: int = 1536) -> List[np.ndarray]:
+    """
+    Normalize model embeddings and pad them with zeros to the database vector dimension.
+    
+    Args:
+        embeddings (np.ndarray): Embeddings returned by the model
+        embedding_dim (int): Target dimension
+        
+    Returns:
+        List[np.ndarray]: List of unit-length embeddings with embedding_dim dimensions
+    """
     padded_embeddings = []
     for embedding in embeddings:
         # Normalize the original embedding
         normalized = embedding / np.linalg.norm(embedding)
         # Pad with zeros to reach 1536 dimensions
-        padded = np.pad(normalized, (0, 1536 - len(normalized)), 'constant')
+        padded = np.pad(normalized, (0, embedding_dim - len(normalized)), 'constant')
         # Normalize again to ensure unit length
         padded = padded / np.linalg.norm(padded)
         padded_embeddings.append(padded)
     
     return padded_embeddings
 
-def preprocess_document(file_path: Path, chunk_size: int = 1000, overlap: int = 500) -> ProcessedDocument:
+def check_max_tokens(model: SentenceTransformer, max_tokens: int) -> None:
+    """Reject a structured chunk size that the model would truncate."""
+    # Leave room for the [CLS] and [SEP] tokens added by the model
+    if max_tokens > model.max_seq_length - 2:
+        raise ValueError(f"max_tokens ({max_tokens}) exceeds the model limit of {model.max_seq_length - 2} tokens")
+
+def chunk_document(file_path: Path, model: SentenceTransformer, chunk_size: int = 1000, overlap: int = 500,
+                   chunking: str = 'chars', max_tokens: int = 400, overlap_tokens: int = 40) -> tuple[List[str], List[Dict[str, any]]]:
     """
-    Preprocess a document for RAG.
+    Extract, clean and chunk a document without embedding it.
     
     Args:
         file_path (Path): Path to the document
-        chunk_size (int): Size of text chunks
-        overlap (int): Overlap between chunks
+        model (SentenceTransformer): Embedding model whose tokenizer measures 'structured' chunks
+        chunk_size (int): Size of text chunks ('chars' chunking)
+        overlap (int): Overlap between chunks ('chars' chunking)
+        chunking (str): 'chars' for fixed-size character chunks, or 'structured' for
+            section/paragraph-aware chunks measured in model tokens
+        max_tokens (int): Maximum tokens per chunk ('structured' chunking)
+        overlap_tokens (int): Maximum tokens repeated between chunks ('structured' chunking)
         
     Returns:
-        ProcessedDocument: Processed document with chunks and metadata
+        tuple[List[str], List[Dict[str, any]]]: Tuple containing:
+            - List of text chunks
+            - List of metadata dictionaries for each chunk
     """
+    if chunking not in ('chars', 'structured'):
+        raise ValueError(f"Unsupported chunking mode: {chunking}")
+    
     # Extract text based on file type
     mime_type = mimetypes.guess_type(file_path)[0]
     
@@ -324,15 +728,52 @@ def preprocess_document(file_path: Path, chunk_size: int = 1000, overlap: int =
     else:
         raise ValueError(f"Unsupported file type: {mime_type}")
     
-    # Clean the text
-    cleaned_text = clean_text(text)
+    if chunking == 'structured':
+        # Keep line breaks so headings and numbered paragraphs can be detected
+        cleaned_text, cleaned_page_info = clean_pages(text, page_info)
+        
+        check_max_tokens(model, max_tokens)
+        chunks, chunks_metadata = chunk_text_structured(cleaned_text, cleaned_page_info, model.tokenizer, max_tokens, overlap_tokens)
+    else:
+        # Clean the text
+        cleaned_text = clean_text(text)
+        
+        # Split into chunks and get chunk metadata
+        chunks, chunks_metadata = chunk_text(cleaned_text, page_info, chunk_size, overlap)
+
+    # Record the source document so chunks of the same document can be merged at query time
+    for chunk_metadata in chunks_metadata:
+        chunk_metadata['source_file_path'] = str(file_path.absolute())
+        chunk_metadata['filename'] = file_path.name
+    
+    return chunks, chunks_metadata
+
+def preprocess_document(file_path: Path, chunk_size: int = 1000, overlap: int = 500, chunking: str = 'chars',
+                        max_tokens: int = 400, overlap_tokens: int = 40,
+                        model_name: str = 'BAAI/bge-large-en-v1.5') -> ProcessedDocument:
+    """
+    Preprocess a document for RAG.
+    
+    Args:
+        file_path (Path): Path to the document
+        chunk_size (int): Size of text chunks ('chars' chunking)
+        overlap (int): Overlap between chunks ('chars' chunking)
+        chunking (str): 'chars' for fixed-size character chunks, or 'structured' for
+            section/paragraph-aware chunks measured in model tokens
+        max_tokens (int): Maximum tokens per chunk ('structured' chunking)
+        overlap_tokens (int): Maximum tokens repeated between chunks ('structured' chunking)
+        model_name (str): Name of the sentence-transformers model to use
+        
+    Returns:
+        ProcessedDocument: Processed document with chunks and metadata
+    """
+    model = SentenceTransformer(model_name)
     
-    # Split into chunks and get chunk metadata
-    chunks, chunks_metadata = chunk_text(cleaned_text, page_info, chunk_size, overlap)
+    chunks, chunks_metadata = chunk_document(file_path, model, chunk_size, overlap, chunking, max_tokens, overlap_tokens)
     
     # Generate embeddings for chunks
     print("Generating embeddings...")
-    chunks_embeddings = generate_embeddings(chunks)
+    chunks_embeddings = generate_embeddings(chunks, model=model)
     print(f"Generated {len(chunks_embeddings)} embeddings of dimension {chunks_embeddings[0].shape[0]}")
     
     # Extract metadata
@@ -346,6 +787,34 @@ def preprocess_document(file_path: Path, chunk_size: int = 1000, overlap: int =
         original_file=file_path
     )
         
+def insert_chunks(postgres_client: PostgresClient, chunks: List[str], chunks_metadata: List[Dict[str, any]],
+                  chunks_embeddings: List[np.ndarray]) -> int:
+    """
+    Insert chunks with their metadata and embeddings into the database.
+    
+    Args:
+        postgres_client (PostgresClient): PostgreSQL client instance
+        chunks (List[str]): Chunk texts
+        chunks_metadata (List[Dict[str, any]]): Metadata for each chunk
+        chunks_embeddings (List[np.ndarray]): Embedding for each chunk
+        
+    Returns:
+        int: Number of inserted chunks
+    """
+    # Rows are loaded with binary COPY: metadata as jsonb and embeddings as binary vectors
+    values = [
+        (chunk, Jsonb(metadata), np.asarray(embedding, dtype=np.float32))
+        for chunk, metadata, embedding in zip(chunks, chunks_metadata, chunks_embeddings)
+    ]
+    
+    postgres_client.copy_rows(
+        'chunks',
+        ['chunk_text', 'metadata', 'embedding'],
+        ['text', 'jsonb', 'vector'],
+        values
+    )
+    return len(values)
+
 def save_chunks_to_db(processed_doc: ProcessedDocument, postgres_client: PostgresClient) -> None:
     """
     Save chunks and their metadata to the database.
@@ -355,44 +824,33 @@ def save_chunks_to_db(processed_doc: ProcessedDocument, postgres_client: Postgre
         postgres_client (PostgresClient): PostgreSQL client instance
     """
     try:
-        # Prepare values for insertion - convert metadata to JSON string and embeddings to list
-        values = [
-            (chunk, json.dumps(metadata), embedding.tolist()) 
-            for chunk, metadata, embedding in zip(
-                processed_doc.chunks, 
-                processed_doc.chunks_metadata, 
-                processed_doc.chunks_embeddings
-            )
-        ]
-        
-        # SQL query template
-        insert_query = """
-            INSERT INTO chunks (chunk_text, metadata, embedding)
-            VALUES %s
-        """
-        
-        # Template for execute_values - using positional parameters for 1536-dimensional vectors
-        template = "(%s, %s::jsonb, %s::vector(1536))"
-        
-        postgres_client.execute_values(insert_query, values, template=template)
-        print(f"✅ Successfully saved {len(values)} chunks to database")
+        saved = insert_chunks(
+            postgres_client,
+            processed_doc.chunks,
+            processed_doc.chunks_metadata,
+            processed_doc.chunks_embeddings
+        )
+        print(f"✅ Successfully saved {saved} chunks to database")
     except Exception as e:
         print(f"❌ Error saving chunks to database: {e}")
         raise
 
-def main(file_path: str):
+def main(file_path: str, chunking: str = 'chars', max_tokens: int = 400, overlap_tokens: int = 40):
     """
     Process and upload a file to PostgreSQL.
     
     Args:
         file_path (str): Path to the file to be processed and uploaded
+        chunking (str): Chunking mode, 'chars' or 'structured'
+        max_tokens (int): Maximum tokens per chunk ('structured' chunking)
+        overlap_tokens (int): Maximum tokens repeated between chunks ('structured' chunking)
     """
     file = get_file_from_path(file_path)
     print_file_size(file)
     
     try:
         # Preprocess the document
-        processed_doc = preprocess_document(file)
+        processed_doc = preprocess_document(file, chunking=chunking, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
         
         # Print some stats
         print(f"\nPreprocessing complete:")
@@ -412,6 +870,9 @@ def main(file_path: str):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Process and upload a file to PostgreSQL')
     parser.add_argument('--file_path', type=str, help='Path to the file to be processed and uploaded', default='C:/Users/asafk/Downloads/NAT DOC 007_Eff.20MAR2025.pdf')
+    parser.add_argument('--chunking', type=str, choices=['chars', 'structured'], default='chars', help='Chunking mode: fixed-size characters or section/token aware')
+    parser.add_argument('--max_tokens', type=int, default=400, help='Maximum tokens per chunk (structured chunking)')
+    parser.add_argument('--overlap_tokens', type=int, default=40, help='Maximum tokens repeated between chunks (structured chunking)')
     
     args = parser.parse_args()
-    main(args.file_path)
+    main(args.file_path, args.chunking, args.max_tokens, args.overlap_tokens)
@@ -0,0 +1,303 @@
+import os
+import sys
+import math
+import time
+import argparse
+import threading
+import multiprocessing
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+from file_upload import PostgresClient
+from batch_ingest import (
+    build_options,
+    init_worker,
+    prepare_document_task,
+    register_document,
+    store_batch_task,
+    update_document,
+)
+
+# Claims the oldest queued job, or a running job whose worker stopped sending heartbeats.
+# SKIP LOCKED lets several workers poll the same table without blocking each other.
+CLAIM_JOB_QUERY = """
+    UPDATE ingestion_jobs
+    SET status = 'running', attempts = attempts + 1, error = NULL,
+        started_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+    WHERE id = (
+        SELECT id FROM ingestion_jobs
+        WHERE (status = 'queued' OR (status = 'running' AND updated_at < CURRENT_TIMESTAMP - make_interval(secs => %s)))
+        AND attempts < %s
+        ORDER BY created_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING *
+"""
+
+# Gives up on jobs that kept losing their worker (e.g. a document that crashes the process)
+FAIL_ABANDONED_JOBS_QUERY = """
+    UPDATE ingestion_jobs
+    SET status = 'failed', error = 'Worker stopped responding', finished_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE status = 'running'
+    AND updated_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+    AND attempts >= %s
+"""
+
+# Refreshes the heartbeat of a job only while this worker still owns it (same claim, still running)
+HEARTBEAT_QUERY = """
+    UPDATE ingestion_jobs SET updated_at = CURRENT_TIMESTAMP
+    WHERE id = %s AND attempts = %s AND status = 'running'
+    RETURNING id
+"""
+
+class JobLost(Exception):
+    """Raised when a job was reclaimed by another worker (or failed) while this worker processed it"""
+
+class JobHeartbeat:
+    """
+    Keeps a claimed job's heartbeat fresh from a background thread while it is processed.
+
+    Parsing and chunking a large PDF, or embedding one slow batch, can take longer than
+    `stale_after`; without a heartbeat another worker would reclaim the job and both would ingest
+    the same document. The thread uses its own connection, since clients are not thread-safe.
+    """
+
+    def __init__(self, job: Dict[str, Any], interval: float):
+        """
+        Initialize the JobHeartbeat.
+
+        Args:
+            job (Dict[str, Any]): The claimed ingestion_jobs row
+            interval (float): Seconds between heartbeats
+        """
+        self.job = job
+        self.interval = interval
+        self.lost = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        db = PostgresClient()
+        db.connect()
+        try:
+            while not self._stop_event.wait(self.interval):
+                try:
+                    owned = db.execute_query(HEARTBEAT_QUERY, (self.job['id'], self.job['attempts']), fetch=True)
+                except Exception as e:
+                    # A missed heartbeat is retried; the job only goes stale after several
+                    print(f"❌ Heartbeat of job {self.job['id']} failed: {e}")
+                    continue
+                if not owned:
+                    self.lost.set()
+                    return
+        finally:
+            db.disconnect()
+
+    def __enter__(self) -> 'JobHeartbeat':
+        self._thread = threading.Thread(target=self._run, name=f"job-heartbeat-{self.job['id']}", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._stop_event.set()
+        self._thread.join(timeout=self.interval + 5)
+
+def claim_job(db: PostgresClient, stale_after: float, max_attempts: int) -> Optional[Dict[str, Any]]:
+    """
+    Claim the next ingestion job.
+
+    Args:
+        db (PostgresClient): Connected PostgreSQL client
+        stale_after (float): Seconds without a heartbeat after which a running job is reclaimed
+        max_attempts (int): Number of claims after which a job is no longer retried
+
+    Returns:
+        Optional[Dict[str, Any]]: The claimed job, or None when the queue is empty
+    """
+    db.execute_query(FAIL_ABANDONED_JOBS_QUERY, (stale_after, max_attempts))
+    jobs = db.execute_query(CLAIM_JOB_QUERY, (stale_after, max_attempts), fetch=True)
+    return jobs[0] if jobs else None
+
+def update_job(db: PostgresClient, job: Dict[str, Any], status: str, **fields) -> None:
+    """
+    Update the status (and optionally other columns) of an ingestion job; also refreshes its heartbeat.
+
+    Args:
+        db (PostgresClient): Connected PostgreSQL client
+        job (Dict[str, Any]): The claimed ingestion_jobs row
+        status (str): New status
+        **fields: Extra columns to set (document_id, total_chunks, processed_chunks, error)
+
+    Raises:
+        JobLost: If the job is no longer running under this worker's claim
+    """
+    assignments = ', '.join(f"{name} = %s" for name in fields)
+    if status in ('completed', 'failed'):
+        assignments += (', ' if assignments else '') + 'finished_at = CURRENT_TIMESTAMP'
+    updated = db.execute_query(
+        f"""
+        UPDATE ingestion_jobs SET status = %s, {assignments + ', ' if assignments else ''}updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s AND attempts = %s AND status = 'running'
+        RETURNING id
+        """,
+        (status, *fields.values(), job['id'], job['attempts']),
+        fetch=True
+    )
+    if not updated:
+        raise JobLost(f"Job {job['id']} is no longer owned by this worker")
+
+def process_job(db: PostgresClient, job: Dict[str, Any], options: Dict[str, Any],
+                heartbeat: Optional[JobHeartbeat] = None) -> None:
+    """
+    Ingest the document of a job, committing and reporting progress batch by batch.
+
+    Batches are checkpointed in ingestion_batches exactly like batch_ingest, so a job reclaimed
+    after a crash resumes from its last committed batch. Every progress update checks that the job
+    is still owned by this worker, and processing stops as soon as it is not.
+
+    Args:
+        db (PostgresClient): Connected PostgreSQL client used for bookkeeping
+        job (Dict[str, Any]): The claimed ingestion_jobs row
+        options (Dict[str, Any]): Chunking and batching options (see batch_ingest.build_options)
+        heartbeat (JobHeartbeat, optional): Running heartbeat of the job
+    """
+    def check_owned():
+        if heartbeat is not None and heartbeat.lost.is_set():
+            raise JobLost(f"Job {job['id']} is no longer owned by this worker")
+
+    file_path = Path(job['file_path'])
+    document_id = None
+    try:
+        document_id = register_document(db, file_path, options)
+        if document_id is None:
+            update_job(db, job, 'completed')
+            return
+
+        update_job(db, job, 'running', document_id=document_id)
+        update_document(db, document_id, 'processing')
+        _, chunks, chunks_metadata = prepare_document_task(document_id, str(file_path), options)
+        check_owned()
+
+        batch_size = options['batch_size']
+        total_batches = math.ceil(len(chunks) / batch_size)
+        committed = {
+            row['batch_index']: row['chunk_count'] for row in db.execute_query(
+                "SELECT batch_index, chunk_count FROM ingestion_batches WHERE document_id = %s", (document_id,)
+            )
+        }
+        processed = sum(committed.values())
+        update_document(db, document_id, 'processing', total_chunks=len(chunks), total_batches=total_batches)
+        update_job(db, job, 'running', total_chunks=len(chunks), processed_chunks=processed)
+        print(f"Job {job['id']} ({job['filename']}): {len(chunks)} chunks, {total_batches} batches ({len(committed)} already committed)")
+
+        for batch_index in range(total_batches):
+            if batch_index in committed:
+                continue
+            check_owned()
+            start = batch_index * batch_size
+            _, _, written = store_batch_task(document_id, batch_index, chunks[start:start + batch_size],
+                                             chunks_metadata[start:start + batch_size])
+            processed += written
+            update_job(db, job, 'running', processed_chunks=processed)
+
+        update_document(db, document_id, 'done')
+        update_job(db, job, 'completed')
+        print(f"✅ Job {job['id']} ({job['filename']}) completed")
+
+    except JobLost as e:
+        # Another worker has taken over (or the job was failed); leave the bookkeeping to it
+        print(f"Stopping: {e}")
+
+    except Exception as e:
+        print(f"❌ Job {job['id']} ({job['filename']}) failed: {e}")
+        if document_id is not None:
+            update_document(db, document_id, 'failed', error=str(e))
+        try:
+            update_job(db, job, 'failed', error=str(e))
+        except JobLost as lost:
+            print(f"Warning: {lost}")
+
+def worker_loop(options: Dict[str, Any], torch_threads: int, poll_interval: float, stale_after: float,
+                max_attempts: int) -> None:
+    """
+    Worker process: load the model once, then claim and process jobs until stopped.
+
+    Args:
+        options (Dict[str, Any]): Chunking and batching options
+        torch_threads (int): Number of torch threads in this process
+        poll_interval (float): Seconds to wait when the queue is empty
+        stale_after (float): Seconds without a heartbeat after which a running job is reclaimed
+        max_attempts (int): Number of claims after which a job is no longer retried
+    """
+    init_worker(options['model_name'], torch_threads)
+    db = PostgresClient()
+    db.connect()
+    try:
+        while True:
+            job = claim_job(db, stale_after, max_attempts)
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+            print(f"Claimed job {job['id']} ({job['filename']}, attempt {job['attempts']})")
+            # Several heartbeats fit in the stale window, so one missed heartbeat does not lose the job
+            with JobHeartbeat(job, interval=stale_after / 4) as heartbeat:
+                process_job(db, job, options, heartbeat)
+    finally:
+        db.disconnect()
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Run a pool of worker processes that ingest uploaded documents from the ingestion_jobs table.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+    """
+    cpu_count = os.cpu_count() or 1
+    workers = args.workers or max(1, min(2, cpu_count))
+    torch_threads = args.torch_threads or max(1, cpu_count // workers)
+    options = build_options(args)
+
+    print(f"Starting {workers} ingestion workers ({torch_threads} torch threads each)")
+    processes = [
+        multiprocessing.Process(
+            target=worker_loop,
+            args=(options, torch_threads, args.poll_interval, args.stale_after, args.max_attempts),
+            name=f"ingest-worker-{i}"
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Interrupted jobs are reclaimed by the next worker once their heartbeat goes stale
+        print("Stopping workers")
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+    if any(process.exitcode not in (0, -15) for process in processes):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Ingest documents uploaded through the API from the ingestion_jobs queue')
+    parser.add_argument('--workers', type=int, help='Number of worker processes (default: up to 2)')
+    parser.add_argument('--torch_threads', type=int, help='Torch threads per worker (default: cores / workers)')
+    parser.add_argument('--poll_interval', type=float, default=2.0, help='Seconds between polls of an empty queue')
+    parser.add_argument('--stale_after', type=float, default=600.0, help='Seconds without progress after which a running job is reclaimed')
+    parser.add_argument('--max_attempts', type=int, default=3, help='Number of times a job is attempted before it is marked failed')
+    parser.add_argument('--batch_size', type=int, default=64, help='Number of chunks per committed batch')
+    parser.add_argument('--chunking', type=str, choices=['chars', 'structured'], default='chars', help='Chunking mode')
+    parser.add_argument('--chunk_size', type=int, default=1000, help='Size of text chunks in characters (chars chunking)')
+    parser.add_argument('--overlap', type=int, default=500, help='Overlap between chunks in characters (chars chunking)')
+    parser.add_argument('--max_tokens', type=int, default=400, help='Maximum tokens per chunk (structured chunking)')
+    parser.add_argument('--overlap_tokens', type=int, default=40, help='Maximum tokens repeated between chunks (structured chunking)')
+    parser.add_argument('--model_name', type=str, default='BAAI/bge-large-en-v1.5', help='Sentence-transformers model to use')
+
+    main(parser.parse_args())
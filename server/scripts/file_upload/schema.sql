@@ -1,5 +1,9 @@
--- Create enum for supported file types
-CREATE TYPE file_type AS ENUM ('application/pdf');
+-- Create enum for supported file types (guarded so the schema can be re-applied)
+DO $$ BEGIN
+    CREATE TYPE file_type AS ENUM ('application/pdf');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
 
 -- Table for storing documents
 CREATE TABLE IF NOT EXISTS documents (
@@ -53,7 +57,51 @@ CREATE TABLE IF NOT EXISTS chunk_pages (
     UNIQUE (chunk_id, page_id)
 );
 
+-- Table for tracking batch ingestion progress per document
+CREATE TABLE IF NOT EXISTS ingestion_documents (
+    id SERIAL PRIMARY KEY,
+    file_path TEXT NOT NULL UNIQUE,
+    file_size BIGINT NOT NULL,
+    modified_time DOUBLE PRECISION NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending, processing, done, failed
+    options JSONB NOT NULL,                  -- Chunking and batching options the batches were built with
+    total_chunks INTEGER,
+    total_batches INTEGER,
+    error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Table recording every batch of chunks committed for a document (the resume checkpoints)
+CREATE TABLE IF NOT EXISTS ingestion_batches (
+    document_id INTEGER NOT NULL REFERENCES ingestion_documents(id) ON DELETE CASCADE,
+    batch_index INTEGER NOT NULL,
+    chunk_count INTEGER NOT NULL,
+    committed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (document_id, batch_index)
+);
+
+-- Queue of uploaded documents waiting to be ingested by scripts/file_upload/ingest_worker.py
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id SERIAL PRIMARY KEY,
+    file_path TEXT NOT NULL,                 -- Where the API stored the upload
+    filename TEXT NOT NULL,
+    content_hash TEXT NOT NULL,              -- SHA-256 of the upload; the same document is only ingested once
+    status TEXT NOT NULL DEFAULT 'queued',   -- queued, running, completed, failed
+    document_id INTEGER REFERENCES ingestion_documents(id) ON DELETE SET NULL,
+    total_chunks INTEGER,
+    processed_chunks INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP  -- Doubles as the worker heartbeat
+);
+
 -- Create indexes for better query performance
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status ON ingestion_jobs(status, created_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ingestion_jobs_content_hash ON ingestion_jobs(content_hash);
 CREATE INDEX IF NOT EXISTS idx_documents_file_type ON documents(file_type);
 CREATE INDEX IF NOT EXISTS idx_chunks_metadata ON chunks USING gin (metadata);  -- For querying JSONB fields
 CREATE INDEX IF NOT EXISTS idx_chunks_source_file ON chunks((metadata->>'source_file_path'));
@@ -78,14 +126,20 @@ RETURNS TABLE (
 )
 LANGUAGE sql
 AS $$
-    SELECT 
-        id as chunk_id,
-        chunk_text,
-        metadata,
-        1 - (embedding <=> query_embedding) as similarity
-    FROM chunks
-    WHERE embedding IS NOT NULL 
-    AND 1 - (embedding <=> query_embedding) > similarity_threshold
-    ORDER BY similarity DESC
-    LIMIT max_results;
+    -- Order by the distance operator itself so the HNSW index can serve the top-K;
+    -- the threshold is applied to those nearest rows (filtering in the inner query forces a seq scan)
+    SELECT chunk_id, chunk_text, metadata, similarity
+    FROM (
+        SELECT
+            id as chunk_id,
+            chunk_text,
+            metadata,
+            1 - (embedding <=> query_embedding) as similarity
+        FROM chunks
+        WHERE embedding IS NOT NULL
+        ORDER BY embedding <=> query_embedding
+        LIMIT max_results
+    ) nearest
+    WHERE similarity > similarity_threshold
+    ORDER BY similarity DESC;
 $$; 
\ No newline at end of file
@@ -0,0 +1,411 @@
+import time
+import queue
+import argparse
+import threading
+import mimetypes
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import List, Dict, Iterator, Optional, Tuple, Any
+import PyPDF2
+from sentence_transformers import SentenceTransformer
+
+from file_upload import (
+    get_file_from_path,
+    print_file_size,
+    clean_text,
+    clean_line,
+    find_chunk_end,
+    build_chunk_metadata,
+    iter_lines,
+    iter_units,
+    size_units,
+    pack_units,
+    build_structured_chunk,
+    check_max_tokens,
+    count_truncated_chunks,
+    pad_embeddings,
+    insert_chunks,
+    PostgresClient,
+)
+
+# Marks the end of a stage's output
+_DONE = object()
+# How often blocked stages wake up to check whether another stage failed
+_POLL_INTERVAL = 0.1
+
+@dataclass
+class StreamingStats:
+    """Counters and timings collected while a document streams through the pipeline"""
+    pages: int = 0
+    chunks: int = 0
+    batches: int = 0
+    saved_chunks: int = 0
+    truncated_chunks: int = 0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+
+class PipelineAborted(Exception):
+    """Raised inside a stage when another stage failed"""
+
+def _put(q: queue.Queue, item: Any, stop_event: threading.Event) -> None:
+    """Put an item on a bounded queue, giving up if the pipeline is aborted."""
+    while True:
+        if stop_event.is_set():
+            raise PipelineAborted()
+        try:
+            q.put(item, timeout=_POLL_INTERVAL)
+            return
+        except queue.Full:
+            continue
+
+def _get(q: queue.Queue, stop_event: threading.Event) -> Any:
+    """Get an item from a queue, giving up if the pipeline is aborted."""
+    while True:
+        if stop_event.is_set():
+            raise PipelineAborted()
+        try:
+            return q.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+
+def iter_pdf_pages(file_path: Path) -> Iterator[Tuple[int, str, Any]]:
+    """
+    Extract PDF pages one at a time.
+
+    Args:
+        file_path (Path): Path to the PDF file
+
+    Yields:
+        Tuple[int, str, Any]: Page number, page text and page mediabox
+    """
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page_num, page in enumerate(pdf_reader.pages, 1):
+            yield page_num, page.extract_text() or '', page.mediabox
+
+def iter_chunks(pages: Iterator[Tuple[int, str, Any]], chunk_size: int = 1000, overlap: int = 500) -> Iterator[Tuple[str, Dict[str, any]]]:
+    """
+    Chunk a stream of pages with the same boundaries as chunk_text, keeping only a small window of text.
+
+    Pages are cleaned individually and joined with a single space, and a chunk is only emitted once
+    enough text follows it that its boundary cannot change. Offsets in the metadata refer to the
+    concatenated cleaned text.
+
+    Args:
+        pages (Iterator[Tuple[int, str, Any]]): Page number, raw text and mediabox per page
+        chunk_size (int): Maximum size of each chunk
+        overlap (int): Number of characters to overlap between chunks
+
+    Yields:
+        Tuple[str, Dict[str, any]]: Chunk text and chunk metadata
+    """
+    buffer = ''  # Text from buffer_offset onwards
+    buffer_offset = 0
+    page_info: List[Dict[str, any]] = []
+    start = 0  # Global start of the next chunk
+    chunk_index = 0
+
+    def emit(is_final: bool):
+        nonlocal start, chunk_index
+        text_length = buffer_offset + len(buffer)
+        # A chunk is final once its nominal end lies inside the buffer; at the end of the
+        # document the remaining chunks are emitted exactly like chunk_text would
+        while start < text_length and (is_final or start + chunk_size < text_length):
+            local_start = start - buffer_offset
+            local_end = find_chunk_end(buffer, local_start, chunk_size, overlap)
+            end = buffer_offset + local_end
+            chunk = buffer[local_start:local_end].strip()
+            yield chunk, build_chunk_metadata(chunk, chunk_index, start, end, end >= text_length, page_info)
+            start = min(end, start + chunk_size - overlap)
+            chunk_index += 1
+
+    for page_num, page_text, mediabox in pages:
+        cleaned = clean_text(page_text)
+        if not cleaned:
+            continue
+        if buffer_offset + len(buffer) > 0:
+            buffer += ' '
+        page_start = buffer_offset + len(buffer)
+        buffer += cleaned
+        page_info.append({
+            'page_number': page_num,
+            'start_char': page_start,
+            'end_char': page_start + len(cleaned),
+            'page_size': mediabox,
+            'page_text_length': len(cleaned)
+        })
+
+        yield from emit(is_final=False)
+
+        # Drop text and pages that no future chunk can reach
+        drop = start - buffer_offset
+        if drop > 0:
+            buffer = buffer[drop:]
+            buffer_offset = start
+        page_info = [page for page in page_info if page['end_char'] > buffer_offset]
+
+    yield from emit(is_final=True)
+
+class TextWindow:
+    """
+    The tail of a growing document, sliced with offsets into the whole document.
+
+    Text before `offset` has been dropped; slicing it is an error.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.offset = 0
+
+    @property
+    def end(self) -> int:
+        """Length of the whole document so far."""
+        return self.offset + len(self.text)
+
+    def append(self, text: str) -> None:
+        self.text += text
+
+    def trim(self, offset: int) -> None:
+        """Drop the text before `offset`."""
+        if offset > self.offset:
+            self.text = self.text[offset - self.offset:]
+            self.offset = offset
+
+    def __getitem__(self, item: slice) -> str:
+        if item.start < self.offset:
+            raise IndexError(f"Text before offset {self.offset} was already dropped")
+        return self.text[item.start - self.offset:item.stop - self.offset]
+
+def iter_chunks_structured(pages: Iterator[Tuple[int, str, Any]], tokenizer, max_tokens: int = 400,
+                           overlap_tokens: int = 40, min_tokens: int = 100) -> Iterator[Tuple[str, Dict[str, any]]]:
+    """
+    Chunk a stream of pages exactly like chunk_text_structured, keeping only a small window of text.
+
+    Pages are cleaned line by line and joined with a line break (as clean_pages does), and units
+    flow through the same splitting, sizing and packing steps as they complete. Each chunk is
+    emitted once the next one has started, so only the text of the chunk being built is kept.
+
+    Args:
+        pages (Iterator[Tuple[int, str, Any]]): Page number, raw text and mediabox per page
+        tokenizer: Hugging Face tokenizer of the embedding model
+        max_tokens (int): Maximum number of tokens per chunk (excluding special tokens)
+        overlap_tokens (int): Maximum number of tokens repeated between consecutive chunks
+        min_tokens (int): Minimum chunk size before a section boundary closes a chunk
+
+    Yields:
+        Tuple[str, Dict[str, any]]: Chunk text and chunk metadata
+    """
+    window = TextWindow()
+    page_info: List[Dict[str, any]] = []
+
+    def lines():
+        for page_num, page_text, mediabox in pages:
+            cleaned = '\n'.join(line for line in (clean_line(line) for line in page_text.splitlines()) if line)
+            if not cleaned:
+                continue
+            if window.end > 0:
+                window.append('\n')
+            page_start = window.end
+            window.append(cleaned)
+            page_info.append({
+                'page_number': page_num,
+                'start_char': page_start,
+                'end_char': page_start + len(cleaned),
+                'page_size': mediabox,
+                'page_text_length': len(cleaned)
+            })
+            yield from iter_lines(cleaned, page_start)
+
+    sized_units = (
+        piece for unit in iter_units(lines())
+        for piece in size_units(window, [unit], tokenizer, max_tokens)
+    )
+
+    pending: Optional[List[Dict[str, any]]] = None
+    chunk_index = 0
+    for group in pack_units(sized_units, max_tokens, overlap_tokens, min_tokens):
+        if pending is not None:
+            yield build_structured_chunk(window, pending, chunk_index, False, page_info)
+            chunk_index += 1
+            # Later chunks start at or after this one (overlap only repeats its own units)
+            window.trim(group[0]['start_char'])
+            page_info[:] = [page for page in page_info if page['end_char'] > window.offset]
+        pending = group
+    if pending is not None:
+        yield build_structured_chunk(window, pending, chunk_index, True, page_info)
+
+def stream_document(file_path: Path, postgres_client: PostgresClient, model: SentenceTransformer,
+                    chunk_size: int = 1000, overlap: int = 500, batch_size: int = 64,
+                    queue_size: int = 4, chunking: str = 'chars', max_tokens: int = 400,
+                    overlap_tokens: int = 40) -> StreamingStats:
+    """
+    Ingest a document through a pipeline of overlapping stages connected by bounded queues.
+
+    Stages: page extraction and chunking -> embedding in batches -> database writes. Each stage runs
+    in its own thread, so embedding overlaps with parsing and writes overlap with encoding, while the
+    bounded queues keep at most a few batches in memory regardless of document size. Batches are
+    streamed to the server as they are embedded and committed together once the document is done.
+
+    Args:
+        file_path (Path): Path to the PDF document
+        postgres_client (PostgresClient): PostgreSQL client used by the writer stage
+        model (SentenceTransformer): Loaded embedding model
+        chunk_size (int): Size of text chunks ('chars' chunking)
+        overlap (int): Overlap between chunks ('chars' chunking)
+        batch_size (int): Number of chunks embedded and written together
+        queue_size (int): Maximum number of batches waiting between two stages
+        chunking (str): 'chars' or 'structured', producing the same chunks as chunk_document
+        max_tokens (int): Maximum tokens per chunk ('structured' chunking)
+        overlap_tokens (int): Maximum tokens repeated between chunks ('structured' chunking)
+
+    Returns:
+        StreamingStats: Counters and per-stage busy time
+    """
+    if chunking not in ('chars', 'structured'):
+        raise ValueError(f"Unsupported chunking mode: {chunking}")
+    if chunking == 'structured':
+        check_max_tokens(model, max_tokens)
+
+    mime_type = mimetypes.guess_type(file_path)[0]
+    if mime_type != 'application/pdf':
+        raise ValueError(f"Unsupported file type: {mime_type}")
+
+    stats = StreamingStats()
+    stop_event = threading.Event()
+    errors: List[BaseException] = []
+    chunk_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    embedded_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    source = {'source_file_path': str(file_path.absolute()), 'filename': file_path.name}
+
+    def add_time(stage: str, seconds: float):
+        stats.stage_seconds[stage] = stats.stage_seconds.get(stage, 0.0) + seconds
+
+    def run_stage(target):
+        def wrapper():
+            try:
+                target()
+            except PipelineAborted:
+                pass
+            except BaseException as e:
+                errors.append(e)
+                stop_event.set()
+        return threading.Thread(target=wrapper, daemon=True)
+
+    def chunker():
+        def counted_pages():
+            for page in iter_pdf_pages(file_path):
+                stats.pages += 1
+                yield page
+
+        batch_chunks, batch_metadata = [], []
+        started = time.perf_counter()
+        if chunking == 'structured':
+            chunk_stream = iter_chunks_structured(counted_pages(), model.tokenizer, max_tokens, overlap_tokens)
+        else:
+            chunk_stream = iter_chunks(counted_pages(), chunk_size, overlap)
+        for chunk, chunk_metadata in chunk_stream:
+            chunk_metadata.update(source)
+            batch_chunks.append(chunk)
+            batch_metadata.append(chunk_metadata)
+            stats.chunks += 1
+            if len(batch_chunks) == batch_size:
+                add_time('parse', time.perf_counter() - started)
+                _put(chunk_queue, (batch_chunks, batch_metadata), stop_event)
+                batch_chunks, batch_metadata = [], []
+                started = time.perf_counter()
+        add_time('parse', time.perf_counter() - started)
+        if batch_chunks:
+            _put(chunk_queue, (batch_chunks, batch_metadata), stop_event)
+        _put(chunk_queue, _DONE, stop_event)
+
+    def embedder():
+        while True:
+            item = _get(chunk_queue, stop_event)
+            if item is _DONE:
+                break
+            batch_chunks, batch_metadata = item
+            started = time.perf_counter()
+            stats.truncated_chunks += count_truncated_chunks(model, batch_chunks)
+            embeddings = pad_embeddings(model.encode(batch_chunks, batch_size=batch_size, show_progress_bar=False))
+            add_time('embed', time.perf_counter() - started)
+            _put(embedded_queue, (batch_chunks, batch_metadata, embeddings), stop_event)
+        _put(embedded_queue, _DONE, stop_event)
+
+    def writer():
+        # The whole document is written in one transaction, so a failure in any stage rolls back
+        # every batch instead of leaving a partial document behind (and a rerun cannot duplicate it)
+        with postgres_client.transaction():
+            while True:
+                item = _get(embedded_queue, stop_event)
+                if item is _DONE:
+                    break
+                batch_chunks, batch_metadata, embeddings = item
+                started = time.perf_counter()
+                stats.saved_chunks += insert_chunks(postgres_client, batch_chunks, batch_metadata, embeddings)
+                add_time('write', time.perf_counter() - started)
+                stats.batches += 1
+                print(f"Wrote batch {stats.batches} ({stats.saved_chunks} chunks, {stats.pages} pages read)")
+
+    threads = [run_stage(chunker), run_stage(embedder), run_stage(writer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return stats
+
+def main(file_path: str, chunk_size: int, overlap: int, batch_size: int, queue_size: int,
+         chunking: str = 'chars', max_tokens: int = 400, overlap_tokens: int = 40,
+         model_name: str = 'BAAI/bge-large-en-v1.5'):
+    """
+    Stream a PDF into PostgreSQL with overlapping extraction, embedding and write stages.
+
+    Args:
+        file_path (str): Path to the file to be processed and uploaded
+        chunk_size (int): Size of text chunks
+        overlap (int): Overlap between chunks
+        batch_size (int): Number of chunks embedded and written together
+        queue_size (int): Maximum number of batches waiting between two stages
+        chunking (str): 'chars' or 'structured'
+        max_tokens (int): Maximum tokens per chunk ('structured' chunking)
+        overlap_tokens (int): Maximum tokens repeated between chunks ('structured' chunking)
+        model_name (str): Name of the sentence-transformers model to use
+    """
+    file = get_file_from_path(file_path)
+    print_file_size(file)
+
+    model = SentenceTransformer(model_name)
+    postgres_client = PostgresClient()
+
+    started = time.perf_counter()
+    try:
+        stats = stream_document(file, postgres_client, model, chunk_size, overlap, batch_size, queue_size,
+                                chunking, max_tokens, overlap_tokens)
+    except Exception as e:
+        print(f"❌ Error during streaming ingestion: {e}")
+        raise
+    finally:
+        postgres_client.disconnect()
+
+    elapsed = time.perf_counter() - started
+    if stats.truncated_chunks:
+        print(f"Warning: {stats.truncated_chunks} of {stats.chunks} chunks exceeded the model limit of {model.max_seq_length} tokens and were truncated")
+    print(f"\n✅ Streamed {stats.pages} pages into {stats.saved_chunks} chunks in {elapsed:.1f}s")
+    for stage, seconds in stats.stage_seconds.items():
+        print(f"- {stage}: {seconds:.1f}s busy")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Stream a PDF into PostgreSQL with a bounded-memory pipeline')
+    parser.add_argument('--file_path', type=str, required=True, help='Path to the file to be processed and uploaded')
+    parser.add_argument('--chunking', type=str, choices=['chars', 'structured'], default='chars', help='Chunking mode')
+    parser.add_argument('--chunk_size', type=int, default=1000, help='Size of text chunks in characters (chars chunking)')
+    parser.add_argument('--overlap', type=int, default=500, help='Overlap between chunks in characters (chars chunking)')
+    parser.add_argument('--max_tokens', type=int, default=400, help='Maximum tokens per chunk (structured chunking)')
+    parser.add_argument('--overlap_tokens', type=int, default=40, help='Maximum tokens repeated between chunks (structured chunking)')
+    parser.add_argument('--batch_size', type=int, default=64, help='Number of chunks embedded and written together')
+    parser.add_argument('--queue_size', type=int, default=4, help='Maximum number of batches waiting between stages')
+
+    args = parser.parse_args()
+    main(args.file_path, args.chunk_size, args.overlap, args.batch_size, args.queue_size,
+         args.chunking, args.max_tokens, args.overlap_tokens)
@@ -0,0 +1,293 @@
+import sys
+import time
+import json
+import argparse
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+
+# Add the server directory to Python path so we can import the postgres client
+server_dir = Path(__file__).resolve().parents[2]
+sys.path.append(str(server_dir))
+
+# Load environment variables from .env file
+load_dotenv(server_dir / '.env')
+
+from src.postgres_client import PostgresClient
+
+EVAL_TABLE = 'chunks_index_eval'
+EVAL_INDEX = 'idx_chunks_index_eval_embedding'
+
+@dataclass
+class EvalResult:
+    """Recall and latency measured for one index configuration"""
+    index_type: str  # 'exact', 'hnsw' or 'ivfflat'
+    build_params: Dict[str, int]  # m/ef_construction or lists
+    search_params: Dict[str, int]  # ef_search or probes
+    recall_at_k: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+    latency_mean_ms: float
+    build_time_s: float
+    index_size_bytes: int
+
+def parse_int_list(value: str) -> List[int]:
+    """Parse a comma separated list of integers from the command line."""
+    return [int(v) for v in value.split(',') if v.strip()]
+
+def load_embeddings(db: PostgresClient) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Export all chunk embeddings from the database.
+
+    Args:
+        db (PostgresClient): Connected PostgreSQL client
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Chunk IDs and a (n, dim) float32 embedding matrix
+    """
+    rows = db.execute_query(
+        "SELECT id, embedding FROM chunks WHERE embedding IS NOT NULL ORDER BY id",
+        binary=True
+    )
+    if not rows:
+        raise ValueError("No embedded chunks found in the database")
+
+    ids = np.array([row['id'] for row in rows], dtype=np.int64)
+    embeddings = np.vstack([row['embedding'] for row in rows])
+    return ids, embeddings
+
+def load_queries(embeddings: np.ndarray, num_queries: int, queries_file: Optional[str], seed: int) -> np.ndarray:
+    """
+    Build the evaluation query set.
+
+    Real questions from a file are embedded with the production model; otherwise a random
+    sample of stored chunk embeddings is used as queries.
+
+    Args:
+        embeddings (np.ndarray): Corpus embedding matrix
+        num_queries (int): Number of sampled queries when no file is given
+        queries_file (str, optional): Text file with one question per line
+        seed (int): Random seed for sampling
+
+    Returns:
+        np.ndarray: (q, dim) float32 query matrix
+    """
+    if queries_file:
+        from src.embedding_manager import EmbeddingManager
+        questions = [line.strip() for line in Path(queries_file).read_text(encoding='utf-8').splitlines() if line.strip()]
+        manager = EmbeddingManager(embedding_dim=embeddings.shape[1])
+        return np.vstack(manager.generate_embedding(questions, show_progress=True)).astype(np.float32)
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(embeddings), size=min(num_queries, len(embeddings)), replace=False)
+    return embeddings[sample]
+
+def exact_top_k(embeddings: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """
+    Compute exact brute-force top-K neighbours by cosine similarity.
+
+    Args:
+        embeddings (np.ndarray): (n, dim) corpus matrix
+        queries (np.ndarray): (q, dim) query matrix
+        k (int): Number of neighbours
+
+    Returns:
+        np.ndarray: (q, k) row indices into the corpus, best first
+    """
+    corpus = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    normalized_queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    scores = normalized_queries @ corpus.T
+
+    k = min(k, corpus.shape[0])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+def create_eval_table(db: PostgresClient) -> None:
+    """Copy the embedded chunks into a scratch table so index experiments never touch production."""
+    db.execute_query(f"DROP TABLE IF EXISTS {EVAL_TABLE}")
+    db.execute_query(
+        f"CREATE TABLE {EVAL_TABLE} AS SELECT id, chunk_text, metadata, embedding FROM chunks WHERE embedding IS NOT NULL"
+    )
+    db.execute_query(f"ANALYZE {EVAL_TABLE}")
+
+def build_index(db: PostgresClient, index_type: str, build_params: Dict[str, int]) -> Tuple[float, int]:
+    """
+    (Re)build the evaluation index with the given parameters.
+
+    Args:
+        db (PostgresClient): Connected PostgreSQL client
+        index_type (str): 'hnsw' or 'ivfflat'
+        build_params (Dict[str, int]): Index storage parameters
+
+    Returns:
+        Tuple[float, int]: Build time in seconds and index size in bytes
+    """
+    db.execute_query(f"DROP INDEX IF EXISTS {EVAL_INDEX}")
+    with_clause = ', '.join(f"{name} = {value}" for name, value in build_params.items())
+
+    start = time.perf_counter()
+    db.execute_query(
+        f"CREATE INDEX {EVAL_INDEX} ON {EVAL_TABLE} USING {index_type} (embedding vector_cosine_ops) WITH ({with_clause})"
+    )
+    build_time = time.perf_counter() - start
+
+    size = db.execute_query("SELECT pg_relation_size(%s::regclass) AS size", (EVAL_INDEX,))[0]['size']
+    return build_time, size
+
+# Same statement as the search_similar_chunks function in schema.sql, run against the scratch table
+SEARCH_QUERY = f"""
+    SELECT chunk_id, chunk_text, metadata, similarity
+    FROM (
+        SELECT id AS chunk_id, chunk_text, metadata, 1 - (embedding <=> %b) AS similarity
+        FROM {EVAL_TABLE}
+        WHERE embedding IS NOT NULL
+        ORDER BY embedding <=> %b
+        LIMIT %s
+    ) nearest
+    WHERE similarity > %s
+    ORDER BY similarity DESC
+"""
+
+def run_queries(db: PostgresClient, queries: np.ndarray, k: int, threshold: float) -> Tuple[List[List[int]], List[float]]:
+    """
+    Run every query against the evaluation table with the current session settings.
+
+    Args:
+        db (PostgresClient): Connected PostgreSQL client
+        queries (np.ndarray): (q, dim) query matrix
+        k (int): Number of neighbours to retrieve
+        threshold (float): Minimum similarity, as passed to search_similar_chunks
+
+    Returns:
+        Tuple[List[List[int]], List[float]]: Retrieved chunk IDs and latency in ms per query
+    """
+    # Queries are sent as binary vectors through a prepared statement, like the API's search path
+    retrieved = []
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        rows = db.execute_query(SEARCH_QUERY, (query, query, k, threshold), prepare=True)
+        latencies.append((time.perf_counter() - start) * 1000)
+        retrieved.append([row['chunk_id'] for row in rows])
+    return retrieved, latencies
+
+def recall_at_k(retrieved: List[List[int]], truth_ids: np.ndarray) -> float:
+    """Mean fraction of the exact top-K that the index returned."""
+    hits = [len(set(found) & set(expected.tolist())) / len(expected) for found, expected in zip(retrieved, truth_ids)]
+    return float(np.mean(hits))
+
+def summarize(index_type: str, build_params: Dict[str, int], search_params: Dict[str, int],
+              retrieved: List[List[int]], latencies: List[float], truth_ids: np.ndarray,
+              build_time: float, index_size: int) -> EvalResult:
+    """Aggregate one configuration's measurements into an EvalResult."""
+    return EvalResult(
+        index_type=index_type,
+        build_params=build_params,
+        search_params=search_params,
+        recall_at_k=recall_at_k(retrieved, truth_ids),
+        latency_p50_ms=float(np.percentile(latencies, 50)),
+        latency_p95_ms=float(np.percentile(latencies, 95)),
+        latency_mean_ms=float(np.mean(latencies)),
+        build_time_s=build_time,
+        index_size_bytes=int(index_size)
+    )
+
+def print_results(results: List[EvalResult], k: int) -> None:
+    """Print results as a table sorted by index type and recall."""
+    print(f"\n{'index':<8} {'build params':<28} {'search params':<18} {f'recall@{k}':>10} {'p50 ms':>8} {'p95 ms':>8} {'build s':>8} {'size MB':>8}")
+    for r in sorted(results, key=lambda r: (r.index_type, -r.recall_at_k, r.latency_p50_ms)):
+        build = ', '.join(f"{k_}={v}" for k_, v in r.build_params.items()) or '-'
+        search = ', '.join(f"{k_}={v}" for k_, v in r.search_params.items()) or '-'
+        print(f"{r.index_type:<8} {build:<28} {search:<18} {r.recall_at_k:>10.4f} {r.latency_p50_ms:>8.2f} "
+              f"{r.latency_p95_ms:>8.2f} {r.build_time_s:>8.1f} {r.index_size_bytes / 1024 / 1024:>8.1f}")
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Evaluate recall@K against latency and index size for HNSW and IVFFlat parameter sweeps.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+    """
+    db = PostgresClient()
+    db.connect()
+
+    try:
+        print("Exporting embeddings...")
+        ids, embeddings = load_embeddings(db)
+        print(f"Loaded {len(ids)} embeddings of dimension {embeddings.shape[1]}")
+        if args.export_path:
+            np.save(args.export_path, embeddings)
+            np.save(Path(args.export_path).with_suffix('.ids.npy'), ids)
+            print(f"Saved embeddings to {args.export_path}")
+
+        queries = load_queries(embeddings, args.num_queries, args.queries_file, args.seed)
+        print(f"Computing exact top-{args.k} for {len(queries)} queries...")
+        truth_ids = ids[exact_top_k(embeddings, queries, args.k)]
+
+        create_eval_table(db)
+        db.execute_query(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+        results = []
+
+        # Baseline: exact sequential scan inside Postgres
+        db.execute_query(f"DROP INDEX IF EXISTS {EVAL_INDEX}")
+        retrieved, latencies = run_queries(db, queries, args.k, args.similarity_threshold)
+        results.append(summarize('exact', {}, {}, retrieved, latencies, truth_ids, 0.0, 0))
+
+        # Force index scans for the sweeps, small tables would otherwise fall back to seq scans
+        db.execute_query("SET enable_seqscan = off")
+
+        for m in args.hnsw_m:
+            for ef_construction in args.hnsw_ef_construction:
+                build_params = {'m': m, 'ef_construction': ef_construction}
+                print(f"Building HNSW index {build_params}...")
+                build_time, index_size = build_index(db, 'hnsw', build_params)
+                for ef_search in args.hnsw_ef_search:
+                    db.execute_query(f"SET hnsw.ef_search = {int(ef_search)}")
+                    retrieved, latencies = run_queries(db, queries, args.k, args.similarity_threshold)
+                    results.append(summarize('hnsw', build_params, {'ef_search': ef_search},
+                                             retrieved, latencies, truth_ids, build_time, index_size))
+
+        for lists in args.ivfflat_lists:
+            build_params = {'lists': lists}
+            print(f"Building IVFFlat index {build_params}...")
+            build_time, index_size = build_index(db, 'ivfflat', build_params)
+            for probes in args.ivfflat_probes:
+                if probes > lists:
+                    continue
+                db.execute_query(f"SET ivfflat.probes = {int(probes)}")
+                retrieved, latencies = run_queries(db, queries, args.k, args.similarity_threshold)
+                results.append(summarize('ivfflat', build_params, {'probes': probes},
+                                         retrieved, latencies, truth_ids, build_time, index_size))
+
+        print_results(results, args.k)
+
+        if args.output:
+            Path(args.output).write_text(json.dumps([asdict(r) for r in results], indent=2))
+            print(f"\n✅ Saved results to {args.output}")
+    finally:
+        if not args.keep_table:
+            db.execute_query(f"DROP TABLE IF EXISTS {EVAL_TABLE}")
+        db.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Evaluate recall@K vs latency for pgvector index parameters')
+    parser.add_argument('--k', type=int, default=10, help='Number of neighbours used for recall@K')
+    parser.add_argument('--num_queries', type=int, default=200, help='Number of chunk embeddings sampled as queries')
+    parser.add_argument('--queries_file', type=str, help='Text file with one question per line (overrides sampling)')
+    parser.add_argument('--similarity_threshold', type=float, default=-1.0,
+                        help='Similarity threshold passed to the search (default: none, so recall@K only measures the index)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for query sampling')
+    parser.add_argument('--hnsw_m', type=parse_int_list, default='8,16,32', help='Comma separated HNSW m values')
+    parser.add_argument('--hnsw_ef_construction', type=parse_int_list, default='64,128', help='Comma separated HNSW ef_construction values')
+    parser.add_argument('--hnsw_ef_search', type=parse_int_list, default='20,40,80,160', help='Comma separated HNSW ef_search values')
+    parser.add_argument('--ivfflat_lists', type=parse_int_list, default='50,100,200', help='Comma separated IVFFlat lists values')
+    parser.add_argument('--ivfflat_probes', type=parse_int_list, default='1,5,10,20', help='Comma separated IVFFlat probes values')
+    parser.add_argument('--maintenance_work_mem', type=str, default='512MB', help='maintenance_work_mem used for index builds')
+    parser.add_argument('--export_path', type=str, help='Optional .npy path to save the exported embeddings')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    parser.add_argument('--keep_table', action='store_true', help=f'Keep the {EVAL_TABLE} scratch table after the run')
+
+    main(parser.parse_args())
@@ -0,0 +1,38 @@
+import sys
+import argparse
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Add the server directory to Python path so we can import the snapshot module
+server_dir = Path(__file__).resolve().parents[2]
+sys.path.append(str(server_dir))
+
+# Load environment variables from .env file
+load_dotenv(server_dir / '.env')
+
+from src.embedding_snapshot import EmbeddingSnapshot, export_snapshot
+
+def main(output: str, dtype: str, batch_size: int) -> None:
+    """
+    Export the chunk embeddings from PostgreSQL to a memory-mappable snapshot file.
+
+    Args:
+        output (str): Path of the snapshot file to write
+        dtype (str): Storage type for the embeddings
+        batch_size (int): Number of rows fetched per query
+    """
+    count = export_snapshot(output, dtype=dtype, batch_size=batch_size)
+
+    # Re-open the file to validate it before workers pick it up
+    snapshot = EmbeddingSnapshot(output)
+    size_mb = Path(output).stat().st_size / 1024 / 1024
+    print(f"✅ Exported {count} chunks ({snapshot.dim} dimensions, {snapshot.dtype}) to {output} ({size_mb:.1f} MB)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export chunk embeddings to a binary snapshot file')
+    parser.add_argument('--output', type=str, required=True, help='Path of the snapshot file to write')
+    parser.add_argument('--dtype', type=str, choices=['float32', 'float16'], default='float32', help='Storage type for the embeddings')
+    parser.add_argument('--batch_size', type=int, default=2000, help='Number of rows fetched per query')
+
+    args = parser.parse_args()
+    main(args.output, args.dtype, args.batch_size)
@@ -0,0 +1,131 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+try:
+    from .metrics import REQUESTS_QUEUED, REQUESTS_REJECTED
+except ImportError:
+    from src.metrics import REQUESTS_QUEUED, REQUESTS_REJECTED
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of time before or during a stage"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded during {stage}")
+        self.stage = stage
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of being queued"""
+
+    def __init__(self, endpoint: str, status_code: int, retry_after: int, reason: str):
+        super().__init__(f"{endpoint} is overloaded ({reason}), retry in {retry_after}s")
+        self.endpoint = endpoint
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+class Deadline:
+    """Time budget of a single request, checked between stages and passed to downstream timeouts"""
+
+    def __init__(self, timeout: float):
+        """
+        Initialize the Deadline.
+
+        Args:
+            timeout (float): Seconds the request may take in total
+        """
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage: str) -> None:
+        """
+        Abort the request if the deadline has passed.
+
+        Args:
+            stage (str): Stage about to start (reported in the error)
+        """
+        if self.expired():
+            raise DeadlineExceeded(stage)
+
+class AdmissionLimiter:
+    """
+    Concurrency limiter with a bounded wait queue for one endpoint.
+
+    At most `max_concurrent` requests run at once and at most `max_queue` more wait for a slot.
+    Requests beyond that are rejected immediately with 429, and queued requests that cannot get a
+    slot within `max_queue_wait` seconds (or before their deadline) are rejected with 503. Both
+    rejections carry a Retry-After estimate derived from recent service times.
+    """
+
+    def __init__(self, endpoint: str, max_concurrent: int = 4, max_queue: int = 16, max_queue_wait: float = 5.0):
+        """
+        Initialize the AdmissionLimiter.
+
+        Args:
+            endpoint (str): Endpoint name used in errors and metrics
+            max_concurrent (int): Requests allowed to run at the same time
+            max_queue (int): Requests allowed to wait for a slot
+            max_queue_wait (float): Maximum seconds a request waits for a slot
+        """
+        self.endpoint = endpoint
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._waiting = 0
+        # Exponentially weighted average of how long an admitted request holds its slot
+        self._avg_service_time = 1.0
+
+    def retry_after(self) -> int:
+        """Estimate in whole seconds when a slot is likely to be free."""
+        backlog = (self._waiting + 1) / self.max_concurrent
+        return max(1, math.ceil(backlog * self._avg_service_time))
+
+    def _reject(self, status_code: int, reason: str) -> AdmissionRejected:
+        REQUESTS_REJECTED.labels(endpoint=self.endpoint, reason=reason).inc()
+        return AdmissionRejected(self.endpoint, status_code, self.retry_after(), reason)
+
+    @asynccontextmanager
+    async def slot(self, deadline: Deadline) -> AsyncIterator[None]:
+        """
+        Hold a concurrency slot for the duration of the block.
+
+        Args:
+            deadline (Deadline): Deadline of the request; waiting never extends past it
+
+        Raises:
+            AdmissionRejected: When the queue is full or no slot frees up in time
+        """
+        if self._semaphore.locked():
+            if self._waiting >= self.max_queue:
+                raise self._reject(429, 'queue_full')
+
+            self._waiting += 1
+            REQUESTS_QUEUED.labels(endpoint=self.endpoint).inc()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=min(self.max_queue_wait, deadline.remaining()))
+            except asyncio.TimeoutError:
+                raise self._reject(503, 'queue_timeout')
+            finally:
+                self._waiting -= 1
+                REQUESTS_QUEUED.labels(endpoint=self.endpoint).dec()
+        else:
+            await self._semaphore.acquire()
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+            self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * (time.monotonic() - started)
@@ -1,6 +1,6 @@
 import os
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 
 class AskYourPdfClient:
@@ -20,7 +20,7 @@ class AskYourPdfClient:
         }
 
     def ask_knowledge_base(self, query: str, temperature: float = 0.7, 
-                          language: str = "ENGLISH", length: str = "SHORT") -> str:
+                          language: str = "ENGLISH", length: str = "SHORT", timeout: Optional[float] = None) -> str:
         url = f"{self.base_url}/knowledge/{self.knowledge_base_id}/chat"
         
         payload = {
@@ -40,7 +40,7 @@ class AskYourPdfClient:
             "cite_source": True
         }
         
-        response = requests.post(url, headers=self.headers, json=payload, params=params)
+        response = requests.post(url, headers=self.headers, json=payload, params=params, timeout=timeout)
         response.raise_for_status()
         return response.json()
 
@@ -0,0 +1,146 @@
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+
+# Rough characters-per-token ratio for English text, used to budget the prompt without a tokenizer
+CHARS_PER_TOKEN = 4
+# Length of the chunk prefix searched for when the expected overlap does not line up exactly
+OVERLAP_PROBE_LENGTH = 50
+
+@dataclass
+class ContextSpan:
+    """A contiguous piece of a source document assembled from one or more retrieved chunks"""
+    source: Optional[str]  # Source document of the chunks (None for chunks without one)
+    start_char: int
+    end_char: int
+    text: str
+    chunk_ids: List[int] = field(default_factory=list)
+    similarity: float = 0.0  # Best similarity of the merged chunks
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in a text.
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Approximate token count
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def merge_texts(left: str, right: str, expected_overlap: int) -> Optional[str]:
+    """
+    Join two chunk texts whose source ranges overlap, keeping the shared text once.
+
+    Chunk texts are stripped slices of the same cleaned document, so the real overlap can be
+    off by a few characters from the overlap computed from their offsets.
+
+    Args:
+        left (str): Text of the earlier chunk
+        right (str): Text of the later chunk
+        expected_overlap (int): Overlap in characters derived from start/end offsets
+
+    Returns:
+        Optional[str]: Merged text, or None when the texts do not actually overlap
+    """
+    if expected_overlap <= 0:
+        return f"{left} {right}"
+
+    for delta in (0, -1, 1, -2, 2, -3, 3):
+        size = expected_overlap + delta
+        if 0 < size <= len(right) and left.endswith(right[:size]):
+            return left + right[size:]
+
+    # Fall back to locating the start of the right chunk inside the tail of the left one
+    probe = right[:OVERLAP_PROBE_LENGTH]
+    position = left.rfind(probe, max(0, len(left) - expected_overlap - OVERLAP_PROBE_LENGTH))
+    if position >= 0 and left[position:] == right[:len(left) - position]:
+        return left[:position] + right
+    return None
+
+def merge_chunks(results: List[Dict[str, Any]], max_gap: int = 1) -> List[ContextSpan]:
+    """
+    Merge retrieved chunks that overlap or are adjacent in the same document into spans.
+
+    Args:
+        results (List[Dict[str, Any]]): Search results with chunk_id, chunk_text, metadata and similarity
+        max_gap (int): Maximum number of characters between two chunks for them to count as adjacent
+
+    Returns:
+        List[ContextSpan]: Merged, de-duplicated spans (unsorted)
+    """
+    spans: List[ContextSpan] = []
+    positioned: Dict[Optional[str], List[Tuple[int, int, Dict[str, Any]]]] = {}
+
+    for result in results:
+        metadata = result.get('metadata') or {}
+        start, end = metadata.get('start_char'), metadata.get('end_char')
+        if start is None or end is None:
+            # Without offsets a chunk can only be used as is
+            spans.append(ContextSpan(None, 0, 0, result['chunk_text'], [result['chunk_id']], result['similarity']))
+            continue
+        positioned.setdefault(metadata.get('source_file_path'), []).append((start, end, result))
+
+    for source, chunks in positioned.items():
+        current: Optional[ContextSpan] = None
+        seen_ids = set()
+        for start, end, result in sorted(chunks, key=lambda c: (c[0], c[1])):
+            if result['chunk_id'] in seen_ids:
+                continue
+            seen_ids.add(result['chunk_id'])
+
+            # Chunks ingested without a source can come from different documents, so offsets alone
+            # are not enough: only merge them when their texts really overlap
+            max_allowed_gap = max_gap if source is not None else -1
+            if current is not None and start <= current.end_char + max_allowed_gap:
+                merged = current.text
+                if end > current.end_char:
+                    merged = merge_texts(current.text, result['chunk_text'], current.end_char - start)
+                elif source is None and result['chunk_text'] not in current.text:
+                    merged = None
+                if merged is not None:
+                    current.text = merged
+                    current.end_char = max(current.end_char, end)
+                    current.chunk_ids.append(result['chunk_id'])
+                    current.similarity = max(current.similarity, result['similarity'])
+                    continue
+
+            current = ContextSpan(source, start, end, result['chunk_text'], [result['chunk_id']], result['similarity'])
+            spans.append(current)
+
+    return spans
+
+def build_context(results: List[Dict[str, Any]], max_tokens: int = 3000) -> Tuple[str, List[ContextSpan]]:
+    """
+    Assemble the LLM context from search results.
+
+    Overlapping and adjacent chunks are merged into contiguous spans so shared text is sent once,
+    then spans are packed best-first until the token budget is used up. A span that does not fit
+    is truncated only when nothing has been packed yet.
+
+    Args:
+        results (List[Dict[str, Any]]): Search results with chunk_id, chunk_text, metadata and similarity
+        max_tokens (int): Token budget for the assembled context
+
+    Returns:
+        Tuple[str, List[ContextSpan]]: The context text and the spans it contains
+    """
+    spans = sorted(merge_chunks(results), key=lambda s: s.similarity, reverse=True)
+
+    packed: List[Tuple[ContextSpan, str]] = []
+    used_tokens = 0
+    for span in spans:
+        ids = ', '.join(str(chunk_id) for chunk_id in span.chunk_ids)
+        section = f"Document {ids} (similarity: {span.similarity:.2f}):\n{span.text}"
+        tokens = estimate_tokens(section)
+
+        if used_tokens + tokens > max_tokens:
+            if packed:
+                continue
+            section = section[:max_tokens * CHARS_PER_TOKEN]
+            tokens = estimate_tokens(section)
+
+        packed.append((span, section))
+        used_tokens += tokens
+
+    return "\n\n".join(section for _, section in packed), [span for span, _ in packed]
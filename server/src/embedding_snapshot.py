@@ -0,0 +1,221 @@
+import os
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+from typing import List, Dict, Any, Sequence, Iterator, Optional
+import numpy as np
+
+# Add the server directory to Python path for direct script execution
+server_dir = Path(__file__).resolve().parent.parent
+if str(server_dir) not in sys.path:
+    sys.path.append(str(server_dir))
+
+try:
+    from .postgres_client import PostgresClient
+except ImportError:
+    from src.postgres_client import PostgresClient
+
+# Snapshot layout (little-endian, every section aligned to SECTION_ALIGNMENT bytes):
+#   header                      see HEADER_FORMAT
+#   ids                         int64[count]
+#   embeddings                  float32|float16[count, dim], rows normalized to unit length
+#   text offsets / text blob    uint64[count + 1] / utf-8 chunk texts
+#   metadata offsets / blob     uint64[count + 1] / utf-8 JSON chunk metadata
+MAGIC = b'AVSNAP01'
+VERSION = 1
+HEADER_FORMAT = '<8sIIQII6Q'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+SECTION_ALIGNMENT = 64
+DTYPE_CODES = {'float32': 1, 'float16': 2}
+DTYPES_BY_CODE = {code: np.dtype(name) for name, code in DTYPE_CODES.items()}
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Normalize each row of a matrix to unit length so dot products equal cosine similarity.
+
+    Args:
+        matrix (np.ndarray): (n, dim) matrix
+
+    Returns:
+        np.ndarray: Row-normalized float32 matrix
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+def _align(offset: int) -> int:
+    """Round an offset up to the next section boundary."""
+    return (offset + SECTION_ALIGNMENT - 1) // SECTION_ALIGNMENT * SECTION_ALIGNMENT
+
+def _encode_blob(values: List[bytes]) -> tuple[np.ndarray, bytes]:
+    """Concatenate byte strings and return their uint64 boundary offsets and the blob."""
+    offsets = np.zeros(len(values) + 1, dtype='<u8')
+    np.cumsum([len(v) for v in values], out=offsets[1:])
+    return offsets, b''.join(values)
+
+class _BlobSequence(Sequence):
+    """Read-only sequence that decodes one entry of a memory-mapped blob on access."""
+
+    def __init__(self, buffer: memoryview, offsets: np.ndarray, base: int, decode):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._base = base
+        self._decode = decode
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        start = self._base + int(self._offsets[index])
+        end = self._base + int(self._offsets[index + 1])
+        return self._decode(self._buffer[start:end])
+
+    def __iter__(self) -> Iterator:
+        return (self[i] for i in range(len(self)))
+
+def write_snapshot(path: str, ids: np.ndarray, embeddings: np.ndarray, texts: Sequence[str],
+                   metadata: Sequence[Dict[str, Any]], dtype: str = 'float32') -> None:
+    """
+    Write chunk IDs, embeddings, texts and metadata to a binary snapshot file.
+
+    The file is written next to the target and atomically renamed into place, so processes
+    that still map the previous snapshot keep reading a consistent file.
+
+    Args:
+        path (str): Target file path
+        ids (np.ndarray): (n,) chunk IDs
+        embeddings (np.ndarray): (n, dim) embedding matrix
+        texts (Sequence[str]): Chunk text per row
+        metadata (Sequence[Dict[str, Any]]): Chunk metadata per row
+        dtype (str): Storage type for the embeddings, 'float32' or 'float16'
+    """
+    if dtype not in DTYPE_CODES:
+        raise ValueError(f"Unsupported snapshot dtype: {dtype}")
+
+    ids = np.ascontiguousarray(ids, dtype='<i8')
+    count = len(ids)
+    dim = embeddings.shape[1] if count else 0
+    matrix = np.ascontiguousarray(normalize_rows(embeddings) if count else embeddings, dtype=np.dtype(dtype).newbyteorder('<'))
+    text_offsets, text_blob = _encode_blob([t.encode('utf-8') for t in texts])
+    metadata_offsets, metadata_blob = _encode_blob([json.dumps(m).encode('utf-8') for m in metadata])
+
+    sections = [ids.tobytes(), matrix.tobytes(), text_offsets.tobytes(), text_blob,
+                metadata_offsets.tobytes(), metadata_blob]
+    offsets = []
+    position = _align(HEADER_SIZE)
+    for section in sections:
+        offsets.append(position)
+        position = _align(position + len(section))
+
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, DTYPE_CODES[dtype], count, dim, 0, *offsets)
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(target.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for offset, section in zip(offsets, sections):
+            f.seek(offset)
+            f.write(section)
+        f.truncate(position)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, target)
+
+class EmbeddingSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot written by `write_snapshot`.
+
+    The embedding matrix is a zero-copy view of the file, so every process that opens the same
+    snapshot shares its pages through the OS page cache.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open and validate a snapshot file.
+
+        Args:
+            path (str): Snapshot file path
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, dtype_code, count, dim, _, *offsets = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not an embedding snapshot: {self.path}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version} in {self.path}")
+
+        ids_offset, embeddings_offset, text_offsets_offset, text_offset, metadata_offsets_offset, metadata_offset = offsets
+        self.dtype = DTYPES_BY_CODE[dtype_code]
+        self.count = count
+        self.dim = dim
+
+        buffer = memoryview(self._mmap)
+        self.ids = np.frombuffer(buffer, dtype='<i8', count=count, offset=ids_offset)
+        self.embeddings = np.frombuffer(
+            buffer, dtype=self.dtype.newbyteorder('<'), count=count * dim, offset=embeddings_offset
+        ).reshape(count, dim)
+        text_offsets = np.frombuffer(buffer, dtype='<u8', count=count + 1, offset=text_offsets_offset)
+        metadata_offsets = np.frombuffer(buffer, dtype='<u8', count=count + 1, offset=metadata_offsets_offset)
+
+        self.texts = _BlobSequence(buffer, text_offsets, text_offset, lambda b: str(b, 'utf-8'))
+        self.metadata = _BlobSequence(buffer, metadata_offsets, metadata_offset, lambda b: json.loads(str(b, 'utf-8')))
+
+    def __len__(self) -> int:
+        return self.count
+
+def export_snapshot(path: str, postgres_client: Optional[PostgresClient] = None,
+                    dtype: str = 'float32', batch_size: int = 2000) -> int:
+    """
+    Export every embedded chunk from the database into a snapshot file.
+
+    Args:
+        path (str): Target file path
+        postgres_client (PostgresClient, optional): Client to read from
+        dtype (str): Storage type for the embeddings, 'float32' or 'float16'
+        batch_size (int): Number of rows fetched per query
+
+    Returns:
+        int: Number of chunks exported
+    """
+    postgres_client = postgres_client or PostgresClient()
+    ids, embeddings, texts, metadata = [], [], [], []
+    last_id = 0
+
+    with postgres_client as db:
+        while True:
+            # Keyset pagination keeps each query cheap and the result sets small
+            rows = db.execute_query(
+                """
+                SELECT id, chunk_text, metadata, embedding
+                FROM chunks
+                WHERE embedding IS NOT NULL AND id > %s
+                ORDER BY id
+                LIMIT %s
+                """,
+                (last_id, batch_size),
+                binary=True
+            )
+            if not rows:
+                break
+            for row in rows:
+                ids.append(row['id'])
+                embeddings.append(row['embedding'])
+                texts.append(row['chunk_text'])
+                metadata.append(row['metadata'])
+            last_id = rows[-1]['id']
+            print(f"Exported {len(ids)} chunks...")
+
+    matrix = np.vstack(embeddings) if embeddings else np.empty((0, 0), dtype=np.float32)
+    write_snapshot(path, np.array(ids, dtype=np.int64), matrix, texts, metadata, dtype)
+    return len(ids)
@@ -0,0 +1,119 @@
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+try:
+    # OpenTelemetry is optional: spans are only emitted when the API package is installed
+    # (and only exported when an SDK tracer provider has been configured by the deployment).
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("aviaite")
+except ImportError:
+    _tracer = None
+
+# Buckets cover sub-millisecond in-memory lookups up to multi-second LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_DURATION = Histogram(
+    'aviaite_stage_duration_seconds',
+    'Time spent in each stage of the request path (embed, db, llm, ...)',
+    ['stage'],
+    buckets=LATENCY_BUCKETS
+)
+
+REQUEST_DURATION = Histogram(
+    'aviaite_request_duration_seconds',
+    'Total time spent serving an API request',
+    ['method', 'endpoint', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+
+REQUESTS_IN_FLIGHT = Gauge(
+    'aviaite_requests_in_flight',
+    'Number of API requests currently being served',
+    ['endpoint']
+)
+
+DB_CONNECTIONS_IN_USE = Gauge(
+    'aviaite_db_connections_in_use',
+    'Number of open database connections held by this process'
+)
+
+REQUESTS_QUEUED = Gauge(
+    'aviaite_requests_queued',
+    'Number of API requests waiting for a concurrency slot',
+    ['endpoint']
+)
+
+REQUESTS_REJECTED = Counter(
+    'aviaite_requests_rejected_total',
+    'Number of API requests shed by admission control',
+    ['endpoint', 'reason']
+)
+
+COALESCED_REQUESTS = Counter(
+    'aviaite_coalesced_requests_total',
+    'Number of API requests that shared an identical in-flight execution',
+    ['endpoint']
+)
+
+DB_READ_ROUTES = Counter(
+    'aviaite_db_read_routes_total',
+    'Read-only database connections by target (replica host:port or primary)',
+    ['target']
+)
+
+STAGE_ERRORS = Counter(
+    'aviaite_stage_errors_total',
+    'Number of failed executions of a request path stage',
+    ['stage']
+)
+
+CACHE_REQUESTS = Counter(
+    'aviaite_cache_requests_total',
+    'Cache lookups by cache name and result (hit or miss)',
+    ['cache', 'result']
+)
+
+
+@contextmanager
+def track_stage(stage: str, **attributes) -> Iterator[None]:
+    """
+    Time a stage of the request path and, when OpenTelemetry is available, wrap it in a span.
+
+    Args:
+        stage (str): Name of the stage (e.g. 'embed', 'db', 'llm')
+        **attributes: Extra span attributes
+    """
+    span = _tracer.start_as_current_span(stage, attributes=attributes) if _tracer else nullcontext()
+    start = time.perf_counter()
+    try:
+        with span:
+            yield
+    except Exception:
+        STAGE_ERRORS.labels(stage=stage).inc()
+        raise
+    finally:
+        STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """
+    Record the result of a cache lookup so hit rates can be derived in Prometheus.
+
+    Args:
+        cache (str): Name of the cache
+        hit (bool): Whether the lookup was a hit
+    """
+    CACHE_REQUESTS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Render all registered metrics in the Prometheus text exposition format.
+
+    Returns:
+        tuple[bytes, str]: The payload and its content type
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,7 +1,186 @@
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor, execute_values
-from typing import Optional, Dict, List, Any, Sequence
+import time
+import threading
+from contextlib import contextmanager
+import psycopg
+from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
+from pgvector.psycopg import register_vector
+from typing import Optional, Dict, List, Any, Sequence, Tuple
+
+try:
+    from .metrics import DB_CONNECTIONS_IN_USE, DB_READ_ROUTES
+except ImportError:
+    from src.metrics import DB_CONNECTIONS_IN_USE, DB_READ_ROUTES
+
+# Connection pools shared by all pooled clients, keyed by connection parameters
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+# Replay lag of a standby in seconds (0 when it has replayed everything it received),
+# and the WAL position it has replayed up to
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END AS lag,
+    pg_last_wal_replay_lsn()::text AS replay_lsn
+"""
+
+def _configure_connection(conn: psycopg.Connection) -> None:
+    """Register the pgvector types so numpy arrays are sent and received as binary vectors."""
+    register_vector(conn)
+    # The type lookups open a transaction; pooled connections must be handed out idle
+    conn.commit()
+
+def _get_pool(connection_params: Dict[str, Any]) -> ConnectionPool:
+    """Get (or lazily open) the shared pool for a set of connection settings."""
+    key = tuple(sorted(connection_params.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                kwargs={**connection_params, 'row_factory': dict_row},
+                configure=_configure_connection,
+                min_size=int(os.getenv('POSTGRES_POOL_MIN_SIZE', '1')),
+                max_size=int(os.getenv('POSTGRES_POOL_MAX_SIZE', '10')),
+                name=f"aviaite-{connection_params['host']}:{connection_params['port']}",
+                open=True
+            )
+            _pools[key] = pool
+        return pool
+
+def parse_hosts(value: str, default_port: int = 5432) -> List[Tuple[str, int]]:
+    """
+    Parse a comma-separated list of host[:port] entries.
+
+    Args:
+        value (str): e.g. "replica-1:5432,replica-2"
+        default_port (int): Port used for entries without one
+
+    Returns:
+        List[Tuple[str, int]]: (host, port) pairs
+    """
+    hosts = []
+    for entry in value.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(':')
+        hosts.append((host, int(port) if port else default_port))
+    return hosts
+
+def parse_lsn(value: str) -> int:
+    """
+    Convert a WAL position ('16/B374D848') into an integer that can be compared.
+
+    Args:
+        value (str): LSN as returned by pg_current_wal_lsn()::text
+
+    Returns:
+        int: The position in bytes
+    """
+    high, _, low = value.partition('/')
+    return (int(high, 16) << 32) | int(low, 16)
+
+class ReplicaRouter:
+    """
+    Chooses the read replica used by read-only clients.
+
+    Replicas are tried round-robin. A replica that cannot be reached is skipped for
+    `retry_interval` seconds, and one whose replay lag exceeds `max_lag` seconds (typically right
+    after an ingest) is skipped until a later lag check shows it has caught up. When no replica
+    is usable, reads fall back to the primary.
+
+    `require_lsn()` sets a primary WAL position that reads must see (e.g. the one at which a new
+    corpus version was observed); a replica serves reads only once it has replayed up to it.
+    """
+
+    def __init__(self, replicas: List[Tuple[str, int]], max_lag: float = 5.0, retry_interval: float = 30.0,
+                 lag_check_interval: float = 5.0):
+        """
+        Initialize the ReplicaRouter.
+
+        Args:
+            replicas (List[Tuple[str, int]]): (host, port) of each replica
+            max_lag (float): Maximum replay lag in seconds for a replica to serve reads
+            retry_interval (float): Seconds an unreachable replica is skipped
+            lag_check_interval (float): Minimum seconds between lag checks of a replica
+        """
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.retry_interval = retry_interval
+        self.lag_check_interval = lag_check_interval
+
+        self._next = 0
+        self._down_until: Dict[Tuple[str, int], float] = {}
+        self._lag: Dict[Tuple[str, int], Tuple[float, float]] = {}  # replica -> (lag, checked_at)
+        self._replayed: Dict[Tuple[str, int], int] = {}  # replica -> last replayed LSN seen
+        self.min_lsn = 0
+        self._lock = threading.Lock()
+
+    def candidates(self) -> List[Tuple[str, int]]:
+        """Replicas worth trying for the next read, in round-robin order."""
+        now = time.monotonic()
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.replicas)
+            ordered = self.replicas[start:] + self.replicas[:start]
+            return [
+                replica for replica in ordered
+                if self._down_until.get(replica, 0.0) <= now
+                and (self._lag.get(replica, (0.0, 0.0))[0] <= self.max_lag or self.lag_check_due(replica))
+            ]
+
+    def lag_check_due(self, replica: Tuple[str, int]) -> bool:
+        """Whether the replica's lag should be measured before using it."""
+        checked_at = self._lag.get(replica, (0.0, None))[1]
+        return checked_at is None or time.monotonic() - checked_at >= self.lag_check_interval
+
+    def mark_down(self, replica: Tuple[str, int]) -> None:
+        """Skip an unreachable replica for `retry_interval` seconds."""
+        with self._lock:
+            self._down_until[replica] = time.monotonic() + self.retry_interval
+
+    def record_lag(self, replica: Tuple[str, int], lag: float, replay_lsn: Optional[int] = None) -> None:
+        """Remember the measured replay lag (and replayed WAL position) of a replica."""
+        with self._lock:
+            self._lag[replica] = (lag, time.monotonic())
+            if replay_lsn is not None:
+                self._replayed[replica] = max(replay_lsn, self._replayed.get(replica, 0))
+
+    def require_lsn(self, lsn: int) -> None:
+        """Only use replicas that have replayed the primary's WAL up to `lsn`."""
+        with self._lock:
+            self.min_lsn = max(self.min_lsn, lsn)
+
+    def caught_up(self, replica: Tuple[str, int]) -> bool:
+        """Whether the replica is known to have replayed up to the required WAL position."""
+        return self._replayed.get(replica, 0) >= self.min_lsn
+
+_replica_router: Optional[ReplicaRouter] = None
+_replica_router_lock = threading.Lock()
+
+def get_replica_router() -> Optional[ReplicaRouter]:
+    """
+    Get the process-wide replica router configured by POSTGRES_REPLICA_HOSTS.
+
+    Returns:
+        Optional[ReplicaRouter]: The router, or None when no replicas are configured
+    """
+    global _replica_router
+    with _replica_router_lock:
+        if _replica_router is None:
+            replicas = parse_hosts(os.getenv('POSTGRES_REPLICA_HOSTS', ''), int(os.getenv('POSTGRES_PORT', '5432')))
+            if not replicas:
+                return None
+            _replica_router = ReplicaRouter(
+                replicas,
+                max_lag=float(os.getenv('POSTGRES_REPLICA_MAX_LAG', '5')),
+                retry_interval=float(os.getenv('POSTGRES_REPLICA_RETRY_INTERVAL', '30')),
+                lag_check_interval=float(os.getenv('POSTGRES_REPLICA_LAG_CHECK_INTERVAL', '5'))
+            )
+        return _replica_router
 
 class PostgresClient:
     def __init__(self, 
@@ -9,43 +188,147 @@ class PostgresClient:
                  port: int = int(os.getenv('POSTGRES_PORT', '5432')),
                  database: str = os.getenv('POSTGRES_DB', 'aviaite'),
                  user: str = os.getenv('POSTGRES_USER', 'postgres'),
-                 password: str = os.getenv('POSTGRES_PASSWORD', 'postgres')):
+                 password: str = os.getenv('POSTGRES_PASSWORD', 'postgres'),
+                 pooled: bool = False,
+                 read_only: bool = False,
+                 connect_timeout: Optional[float] = None):
+        """
+        Initialize the PostgresClient.
+
+        Args:
+            host, port, database, user, password: Connection settings of the primary (default from .env)
+            pooled (bool): Borrow connections from a shared pool instead of opening a new one on
+                every connect(). Pooled connections stay open, so server-side prepared statements
+                are reused across requests.
+            read_only (bool): Route the connection to a read replica from POSTGRES_REPLICA_HOSTS
+                when one is healthy and caught up. Writes must use a client without this flag.
+            connect_timeout (float, optional): Maximum seconds to wait for a connection (or a free
+                pooled connection), e.g. the time left before a request's deadline. Defaults to the
+                driver's / pool's own timeout.
+        """
         self.connection_params = {
             'host': host,
             'port': port,
-            'database': database,
+            'dbname': database,
             'user': user,
             'password': password
         }
+        self.pooled = pooled
+        self.read_only = read_only
+        self.connect_timeout = connect_timeout
         self.conn = None
         self.cursor = None
+        self._pool: Optional[ConnectionPool] = None
+        self._in_transaction = False
 
-    def connect(self) -> None:
-        """Establish connection to the PostgreSQL database."""
-        try:
+    def _open(self, connection_params: Dict[str, Any], timeout: Optional[float] = None) -> None:
+        """Open a connection, or borrow one from the pool for these settings."""
+        if self.pooled:
+            self._pool = _get_pool(connection_params)
+            self.conn = self._pool.getconn(timeout=timeout)
+        else:
             # Print connection string (without password)
-            safe_params = self.connection_params.copy()
+            safe_params = connection_params.copy()
             safe_params['password'] = '***' if safe_params['password'] else ''
-            print(f"Connecting to PostgreSQL database: postgresql://{safe_params['user']}:{safe_params['password']}@{safe_params['host']}:{safe_params['port']}/{safe_params['database']}")
-            self.conn = psycopg2.connect(**self.connection_params)
-            self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+            print(f"Connecting to PostgreSQL database: postgresql://{safe_params['user']}:{safe_params['password']}@{safe_params['host']}:{safe_params['port']}/{safe_params['dbname']}")
+            connect_timeout = {'connect_timeout': max(2, int(timeout))} if timeout else {}
+            self.conn = psycopg.connect(**connection_params, **connect_timeout, row_factory=dict_row)
+            _configure_connection(self.conn)
+        self.cursor = self.conn.cursor()
+
+    def _release(self) -> None:
+        """Close the connection, or return it to its pool."""
+        if self.cursor:
+            self.cursor.close()
+            self.cursor = None
+        if self.conn and not self.conn.closed:
+            if self._pool is not None:
+                # End the implicit read transaction before handing the connection back
+                if self.conn.info.transaction_status != psycopg.pq.TransactionStatus.IDLE:
+                    self.conn.rollback()
+                self._pool.putconn(self.conn)
+            else:
+                self.conn.close()
+        self.conn = None
+        self._pool = None
+
+    def _connect_replica(self) -> Optional[str]:
+        """
+        Connect to a healthy, caught-up read replica.
+
+        Returns:
+            Optional[str]: "host:port" of the replica, or None when no replica is usable
+        """
+        router = get_replica_router()
+        if router is None:
+            return None
+
+        timeout = float(os.getenv('POSTGRES_REPLICA_CONNECT_TIMEOUT', '2'))
+        if self.connect_timeout is not None:
+            timeout = min(timeout, self.connect_timeout)
+        for replica in router.candidates():
+            host, port = replica
+            try:
+                self._open({**self.connection_params, 'host': host, 'port': port}, timeout=timeout)
+                if router.lag_check_due(replica) or not router.caught_up(replica):
+                    self.cursor.execute(REPLICA_LAG_QUERY)
+                    row = self.cursor.fetchone()
+                    lag = row['lag']
+                    router.record_lag(replica, float(lag or 0.0),
+                                      parse_lsn(row['replay_lsn']) if row['replay_lsn'] else None)
+                    if lag is not None and lag > router.max_lag:
+                        print(f"Replica {host}:{port} is {float(lag):.1f}s behind, skipping")
+                        self._release()
+                        continue
+                    if not router.caught_up(replica):
+                        # Reads must see everything the caches were (re)built against
+                        print(f"Replica {host}:{port} has not replayed up to the current corpus version, skipping")
+                        self._release()
+                        continue
+                return f"{host}:{port}"
+            except Exception as e:
+                print(f"❌ Replica {host}:{port} unavailable: {e}")
+                router.mark_down(replica)
+                try:
+                    self._release()
+                except Exception:
+                    self.conn = None
+                    self._pool = None
+        return None
+
+    def connect(self) -> None:
+        """Establish connection to the PostgreSQL database (or a read replica for read-only clients)."""
+        try:
+            target = self._connect_replica() if self.read_only else None
+            if target is None:
+                self._open(self.connection_params, timeout=self.connect_timeout)
+                target = 'primary'
+            if self.read_only:
+                DB_READ_ROUTES.labels(target=target).inc()
+            DB_CONNECTIONS_IN_USE.inc()
         except Exception as e:
             raise Exception(f"Error connecting to PostgreSQL database: {str(e)}")
 
     def disconnect(self) -> None:
-        """Close the database connection."""
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
+        """Close the database connection, or return it to the pool."""
+        if self.conn and not self.conn.closed:
+            DB_CONNECTIONS_IN_USE.dec()
+        self._release()
 
-    def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
+    def execute_query(self, query: str, params: Optional[tuple] = None, fetch: Optional[bool] = None,
+                      prepare: Optional[bool] = None, binary: bool = False) -> List[Dict[str, Any]]:
         """
         Execute a query and return the results.
         
         Args:
             query (str): SQL query to execute
-            params (tuple, optional): Query parameters
+            params (tuple, optional): Query parameters. Numpy arrays are sent as binary vectors.
+            fetch (bool, optional): Whether to return rows; defaults to True for SELECT queries.
+                Statements that modify data are committed unless inside transaction().
+            prepare (bool, optional): True to always use a server-side prepared statement (worth it
+                for hot queries on pooled connections); None lets psycopg prepare after a few calls.
+            binary (bool): Receive results in binary format, so `vector` columns arrive as numpy
+                arrays without being formatted and parsed as text.
             
         Returns:
             List[Dict[str, Any]]: Query results as a list of dictionaries
@@ -54,40 +337,83 @@ class PostgresClient:
             if not self.conn or self.conn.closed:
                 self.connect()
             
-            self.cursor.execute(query, params)
+            self.cursor.execute(query, params, prepare=prepare, binary=binary)
             
-            if query.strip().upper().startswith('SELECT'):
-                return self.cursor.fetchall()
-            else:
+            is_select = query.strip().upper().startswith('SELECT')
+            rows = self.cursor.fetchall() if (is_select if fetch is None else fetch) else []
+            
+            if not is_select and not self._in_transaction:
                 self.conn.commit()
-                return []
+            return rows
                 
         except Exception as e:
             if self.conn:
                 self.conn.rollback()
             raise Exception(f"Error executing query: {str(e)}")
 
-    def execute_values(self, query: str, values: Sequence[tuple], template: Optional[str] = None, page_size: int = 100) -> None:
+    def set_statement_timeout(self, seconds: float) -> None:
+        """
+        Cancel statements of the current transaction that run longer than `seconds`.
+        The setting is transaction-local, so it is reset when the transaction ends.
+        
+        Args:
+            seconds (float): Statement timeout in seconds
+        """
+        self.execute_query(
+            "SELECT set_config('statement_timeout', %s, true)",
+            (f"{max(1, int(seconds * 1000))}ms",)
+        )
+
+    def copy_rows(self, table: str, columns: Sequence[str], types: Sequence[str], rows: Sequence[tuple]) -> None:
         """
-        Execute a query with multiple rows of values using psycopg2.extras.execute_values.
+        Bulk load rows with COPY in binary format, so values such as vectors are never
+        formatted or parsed as text.
         
         Args:
-            query (str): SQL query template with %s for the values clause
-            values (Sequence[tuple]): Sequence of value tuples to insert
-            template (str, optional): Optional template string for formatting values
-            page_size (int): Number of rows to insert in each batch
+            table (str): Target table
+            columns (Sequence[str]): Target columns
+            types (Sequence[str]): Postgres type of each column (e.g. 'text', 'jsonb', 'vector')
+            rows (Sequence[tuple]): Rows to load
         """
         try:
             if not self.conn or self.conn.closed:
                 self.connect()
             
-            execute_values(self.cursor, query, values, template, page_size)
-            self.conn.commit()
+            copy_query = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT BINARY)"
+            with self.cursor.copy(copy_query) as copy:
+                copy.set_types(list(types))
+                for row in rows:
+                    copy.write_row(row)
+            if not self._in_transaction:
+                self.conn.commit()
                 
         except Exception as e:
             if self.conn:
                 self.conn.rollback()
-            raise Exception(f"Error executing values: {str(e)}")
+            raise Exception(f"Error copying rows: {str(e)}")
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run several statements in a single transaction that is committed on success
+        and rolled back if any statement fails.
+        
+        Example:
+            with db.transaction():
+                db.execute_query("INSERT INTO table (col) VALUES (%s)", (1,))
+                db.execute_query("UPDATE progress SET done = true WHERE id = %s", (1,))
+        """
+        if not self.conn or self.conn.closed:
+            self.connect()
+        self._in_transaction = True
+        try:
+            yield self
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self._in_transaction = False
 
     def __enter__(self):
         """Context manager enter method."""
@@ -101,5 +427,5 @@ class PostgresClient:
 # Example usage:
 # with PostgresClient() as db:
 #     results = db.execute_query("SELECT * FROM your_table WHERE column = %s", ('value',))
-#     # For bulk inserts:
-#     db.execute_values("INSERT INTO table (col1, col2) VALUES %s", [(1, 'a'), (2, 'b')]) 
\ No newline at end of file
+#     # For bulk inserts (binary COPY):
+#     db.copy_rows("table", ["col1", "col2"], ["integer", "text"], [(1, 'a'), (2, 'b')])
\ No newline at end of file
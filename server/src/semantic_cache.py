@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+@dataclass
+class CacheEntry:
+    """A cached search: the query embedding, the chunks it retrieved and the final answer"""
+    query: str
+    params: Tuple  # Search parameters the answer was produced with
+    chunk_ids: List[int]
+    response: Any
+    created_at: float
+
+class SemanticQueryCache:
+    """
+    Size-bounded cache that reuses answers for near-duplicate questions.
+
+    A lookup hits when a cached entry with the same search parameters has a query embedding
+    whose cosine similarity to the new query embedding is at least `similarity_threshold`.
+    Entries are evicted least-recently-used first, and the whole cache is dropped when the
+    corpus version reported by `corpus_version_fn` changes (i.e. after a re-ingest). The
+    version is polled by a background thread (see `start`), so lookups never touch the database.
+
+    Every invalidation starts a new generation. Callers capture `generation` before retrieving
+    and pass it to `store()`, so an answer computed from the old corpus that finishes after an
+    invalidation is dropped instead of being cached as current.
+    """
+
+    def __init__(self, embedding_dim: int, similarity_threshold: float = 0.92, max_entries: int = 1000,
+                 corpus_version_fn: Optional[Callable[[], str]] = None, version_check_interval: float = 10.0):
+        """
+        Initialize the SemanticQueryCache.
+
+        Args:
+            embedding_dim (int): Dimension of the query embeddings
+            similarity_threshold (float): Minimum cosine similarity for a cached answer to be reused
+            max_entries (int): Maximum number of cached answers
+            corpus_version_fn (Callable[[], str], optional): Returns the current corpus version
+            version_check_interval (float): Minimum seconds between corpus version checks
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.corpus_version_fn = corpus_version_fn
+        self.version_check_interval = version_check_interval
+
+        # Embeddings live in one preallocated matrix; `_slots` maps slot -> entry in LRU order
+        self._embeddings = np.zeros((max_entries, embedding_dim), dtype=np.float32)
+        self._active = np.zeros(max_entries, dtype=bool)
+        self._slots: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self._corpus_version: Optional[str] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @property
+    def generation(self) -> int:
+        """Number of invalidations so far; capture it before retrieving an answer to store."""
+        return self._generation
+
+    def lookup(self, query_embedding: np.ndarray, params: Tuple) -> Optional[CacheEntry]:
+        """
+        Find a cached answer for a semantically equivalent query.
+
+        Args:
+            query_embedding (np.ndarray): Unit-length query embedding
+            params (Tuple): Search parameters that must match exactly
+
+        Returns:
+            Optional[CacheEntry]: The most similar matching entry, or None
+        """
+        with self._lock:
+            if not self._slots:
+                return None
+
+            scores = self._embeddings @ np.asarray(query_embedding, dtype=np.float32)
+            scores[~self._active] = -np.inf
+            for slot in np.argsort(-scores):
+                if scores[slot] < self.similarity_threshold:
+                    return None
+                entry = self._slots[int(slot)]
+                if entry.params == params:
+                    self._slots.move_to_end(int(slot))
+                    return entry
+            return None
+
+    def store(self, query: str, query_embedding: np.ndarray, params: Tuple, chunk_ids: List[int], response: Any,
+              generation: Optional[int] = None) -> None:
+        """
+        Cache the answer for a query, evicting the least recently used entry when full.
+
+        Args:
+            query (str): Original query text
+            query_embedding (np.ndarray): Unit-length query embedding
+            params (Tuple): Search parameters the answer was produced with
+            chunk_ids (List[int]): IDs of the chunks the answer is based on
+            response (Any): Answer to reuse
+            generation (int, optional): `generation` captured before the answer was retrieved; the
+                answer is dropped when the cache was invalidated since
+        """
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                slot, _ = self._slots.popitem(last=False)
+
+            self._embeddings[slot] = query_embedding
+            self._active[slot] = True
+            self._slots[slot] = CacheEntry(
+                query=query,
+                params=params,
+                chunk_ids=chunk_ids,
+                response=response,
+                created_at=time.time()
+            )
+
+    def invalidate(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._generation += 1
+            self._slots.clear()
+            self._active[:] = False
+            self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def _check_corpus_version(self) -> None:
+        """Invalidate the cache when the corpus changed since the last check."""
+        try:
+            version = self.corpus_version_fn()
+        except Exception as e:
+            print(f"❌ Error checking corpus version: {e}")
+            return
+
+        if self._corpus_version is not None and version != self._corpus_version:
+            print(f"Corpus changed ({self._corpus_version} -> {version}), invalidating semantic cache")
+            self.invalidate()
+        self._corpus_version = version
+
+    def _run(self) -> None:
+        self._check_corpus_version()
+        while not self._stop_event.wait(self.version_check_interval):
+            self._check_corpus_version()
+
+    def start(self) -> None:
+        """Poll the corpus version in a background thread."""
+        if self._thread is not None or self.corpus_version_fn is None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='semantic-cache-version', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the cache size and configuration."""
+        return {
+            'entries': len(self._slots),
+            'max_entries': self.max_entries,
+            'similarity_threshold': self.similarity_threshold,
+            'corpus_version': self._corpus_version
+        }
@@ -1,6 +1,7 @@
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import json
+import os
 import sys
 from pathlib import Path
 
@@ -11,27 +12,64 @@ if str(server_dir) not in sys.path:
 
 try:
     # Try relative import (when used as a module)
-    from .postgres_client import PostgresClient
+    from .postgres_client import PostgresClient, get_replica_router, parse_lsn
     from .embedding_manager import EmbeddingManager
+    from .metrics import track_stage
+    from .vector_index import InMemoryVectorIndex
 except ImportError:
     # Fall back to absolute import (when run as a script)
-    from src.postgres_client import PostgresClient
+    from src.postgres_client import PostgresClient, get_replica_router, parse_lsn
     from src.embedding_manager import EmbeddingManager
+    from src.metrics import track_stage
+    from src.vector_index import InMemoryVectorIndex
 
 class SemanticSearchClient:
     """Client for performing semantic search on the database."""
 
-    def __init__(self, model_name: str = 'BAAI/bge-large-en-v1.5', embedding_dim: int = 1536):
+    def __init__(self, model_name: str = 'BAAI/bge-large-en-v1.5', embedding_dim: int = 1536,
+                 backend: Optional[str] = None):
         """
         Initialize the SemanticSearchClient.
 
         Args:
             model_name (str): Name of the sentence-transformers model to use.
             embedding_dim (int): Target dimension for embeddings.
+            backend (str, optional): 'postgres' to search with pgvector, or 'memory' to search an
+                in-process copy of the embeddings that is refreshed from Postgres.
+                Defaults to the SEARCH_BACKEND environment variable.
         """
+        backend = backend or os.getenv('SEARCH_BACKEND', 'postgres')
+        if backend not in ('postgres', 'memory'):
+            raise ValueError(f"Unsupported search backend: {backend}")
+
         self.embedding_manager = EmbeddingManager(model_name, embedding_dim)
         
-        self.postgres_client = PostgresClient()  # Assumes default connection settings from .env
+        self.vector_index = None
+        self._corpus_version: Optional[str] = None
+        if backend == 'memory':
+            # The index refreshes from a background thread, so it gets its own connection
+            self.vector_index = InMemoryVectorIndex(
+                postgres_client=PostgresClient(),
+                snapshot_path=os.getenv('SEARCH_SNAPSHOT_PATH'),
+                dtype=os.getenv('SEARCH_INDEX_DTYPE', 'float32'),
+                refresh_interval=float(os.getenv('SEARCH_REFRESH_INTERVAL', '30'))
+            )
+            self.vector_index.load()
+            self.vector_index.start_auto_refresh()
+
+    def embed_query(self, query_text: str) -> np.ndarray:
+        """
+        Generate the embedding for a query.
+
+        Args:
+            query_text (str): The text to embed.
+
+        Returns:
+            np.ndarray: Unit-length query embedding.
+        """
+        print(f"Generating embedding for query: '{query_text[:50]}...'")
+        with track_stage('embed'):
+            return self.embedding_manager.generate_embedding(query_text)
 
     def search_similar(self, query_text: str, similarity_threshold: float = 0.5, max_results: int = 5) -> List[Dict[str, Any]]:
         """
@@ -45,28 +83,140 @@ class SemanticSearchClient:
         Returns:
             List[Dict[str, Any]]: List of similar chunks found in the database.
         """
-        print(f"Generating embedding for query: '{query_text[:50]}...'")
-        query_embedding = self.embedding_manager.generate_embedding(query_text)
-        
-        # Convert numpy array to list for SQL query parameter
-        query_embedding_list = self.embedding_manager.embeddings_to_list(query_embedding)
+        query_embedding = self.embed_query(query_text)
+        return self.search_by_embedding(query_embedding, similarity_threshold, max_results)
+
+    def _database(self, read_only: bool = True, timeout: Optional[float] = None) -> PostgresClient:
+        """
+        Get a database client for a single call.
+
+        Clients are not thread-safe, so concurrent requests each borrow their own connection from
+        the shared pool; pooled connections stay open, so prepared statements are reused.
+        Read-only calls are routed to a read replica when replicas are configured, and `timeout`
+        bounds the wait for a pooled connection.
+        """
+        return PostgresClient(pooled=True, read_only=read_only, connect_timeout=timeout)  # Assumes default connection settings from .env
+
+    def search_by_embedding(self, query_embedding: np.ndarray, similarity_threshold: float = 0.5, max_results: int = 5,
+                            timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Search for chunks similar to an already computed query embedding.
+
+        Args:
+            query_embedding (np.ndarray): Unit-length query embedding.
+            similarity_threshold (float): Minimum similarity score (cosine similarity) to include.
+            max_results (int): Maximum number of results to return.
+            timeout (float, optional): Seconds allowed for getting a connection and running the query.
+
+        Returns:
+            List[Dict[str, Any]]: List of similar chunks found in the database.
+
+        Raises:
+            Exception: If the database search fails, so a failure is never mistaken for "no matches".
+        """
+        if self.vector_index is not None:
+            with track_stage('memory_search'):
+                results = self.vector_index.search(query_embedding, similarity_threshold, max_results)
+            print(f"Found {len(results)} similar chunks in memory.")
+            return results
 
+        # The embedding is sent as a binary vector parameter (%b), so it is never formatted or parsed as text
         sql_query = """
-            SELECT * FROM search_similar_chunks(%s::vector, %s::float, %s::integer);
+            SELECT * FROM search_similar_chunks(%b, %s::float, %s::integer);
         """
         
-        params = (query_embedding_list, similarity_threshold, max_results)
+        params = (query_embedding, similarity_threshold, max_results)
         
         print(f"Searching database with threshold={similarity_threshold}, max_results={max_results}")
         try:
-            with self.postgres_client as db:
-                results = db.execute_query(sql_query, params)
+            with track_stage('db'), self._database(timeout=timeout) as db:
+                if timeout is not None:
+                    db.set_statement_timeout(timeout)
+                results = db.execute_query(sql_query, params, prepare=True)
             print(f"Found {len(results)} similar chunks.")
             return results
         except Exception as e:
             print(f"❌ Error during database search: {e}")
+            raise
+
+    def search_similar_batch(self, query_texts: List[str], similarity_threshold: float = 0.5, max_results: int = 5,
+                             timeout: Optional[float] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Search for chunks similar to several queries at once.
+
+        All queries are embedded in a single model call and searched with a single SQL
+        statement (a LATERAL top-K per query vector).
+
+        Args:
+            query_texts (List[str]): The texts to search for.
+            similarity_threshold (float): Minimum similarity score (cosine similarity) to include.
+            max_results (int): Maximum number of results to return per query.
+            timeout (float, optional): Seconds allowed for getting a connection and running the query.
+
+        Returns:
+            List[List[Dict[str, Any]]]: Similar chunks for each query, in query order.
+
+        Raises:
+            Exception: If the database search fails.
+        """
+        if not query_texts:
             return []
 
+        print(f"Generating embeddings for {len(query_texts)} queries")
+        with track_stage('embed'):
+            query_embeddings = self.embedding_manager.generate_embedding(query_texts)
+
+        if self.vector_index is not None:
+            with track_stage('memory_search'):
+                return self.vector_index.search_batch(np.vstack(query_embeddings), similarity_threshold, max_results)
+
+        # The embeddings are sent as one binary vector[] parameter
+        sql_query = """
+            SELECT q.query_index, r.chunk_id, r.chunk_text, r.metadata, r.similarity
+            FROM unnest(%b) WITH ORDINALITY AS q(embedding, query_index)
+            CROSS JOIN LATERAL search_similar_chunks(q.embedding, %s::float, %s::integer) AS r
+            ORDER BY q.query_index, r.similarity DESC;
+        """
+
+        results: List[List[Dict[str, Any]]] = [[] for _ in query_texts]
+        print(f"Searching database for {len(query_texts)} queries with threshold={similarity_threshold}, max_results={max_results}")
+        try:
+            with track_stage('db'), self._database(timeout=timeout) as db:
+                if timeout is not None:
+                    db.set_statement_timeout(timeout)
+                rows = db.execute_query(sql_query, (list(query_embeddings), similarity_threshold, max_results), prepare=True)
+        except Exception as e:
+            print(f"❌ Error during database batch search: {e}")
+            raise
+
+        for row in rows:
+            query_index = row.pop('query_index')
+            results[query_index - 1].append(row)
+        return results
+
+    def corpus_version(self) -> str:
+        """
+        Get a cheap fingerprint of the chunks table that changes whenever chunks are added or removed.
+
+        Returns:
+            str: Version string built from the chunk count and highest chunk ID.
+        """
+        # Read from the primary so a finished ingest is noticed even while replicas catch up
+        with self._database(read_only=False) as db:
+            stats = db.execute_query(
+                "SELECT count(*) AS count, coalesce(max(id), 0) AS max_id, pg_current_wal_lsn()::text AS lsn FROM chunks"
+            )[0]
+        version = f"{stats['count']}:{stats['max_id']}"
+
+        # Caches are rebuilt when the version changes, so from now on searches must only use replicas
+        # that have replayed the primary's WAL up to this version (or fall back to the primary)
+        if version != self._corpus_version:
+            router = get_replica_router()
+            if router is not None:
+                router.require_lsn(parse_lsn(stats['lsn']))
+            self._corpus_version = version
+        return version
+
 # Example Usage (can be run directly for testing)
 if __name__ == '__main__':
     # Make sure .env is loaded if running directly
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+try:
+    from .metrics import COALESCED_REQUESTS
+except ImportError:
+    from src.metrics import COALESCED_REQUESTS
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a question so trivially different spellings share one execution.
+
+    Args:
+        text (str): Raw query text
+
+    Returns:
+        str: Case-folded query with collapsed whitespace
+    """
+    return ' '.join(text.split()).casefold()
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one execution.
+
+    The first caller for a key starts the work in a task; callers arriving with the same key while
+    it is in flight wait for that task and receive its result (or its exception). The task outlives
+    any single caller, so a cancelled or disconnected caller never fails the others. Nothing is kept
+    once the call finishes, so this only removes stampedes and never serves stale answers.
+    """
+
+    def __init__(self, endpoint: str):
+        """
+        Initialize the SingleFlight.
+
+        Args:
+            endpoint (str): Endpoint name used in metrics
+        """
+        self.endpoint = endpoint
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `work` unless an identical call is already in flight, in which case share its outcome.
+
+        Args:
+            key (Hashable): Identity of the call (normalized query and parameters)
+            work (Callable[[], Awaitable[Any]]): Coroutine factory that performs the call
+
+        Returns:
+            Any: The result of the shared execution
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            COALESCED_REQUESTS.labels(endpoint=self.endpoint).inc()
+        else:
+            # The work runs in its own task, so cancelling any caller (including the first one,
+            # e.g. on a client disconnect) never cancels the execution the others are waiting for
+            task = asyncio.create_task(work())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Avoid "exception was never retrieved" warnings when every caller went away
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,275 @@
+import threading
+import sys
+from pathlib import Path
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import numpy as np
+
+# Add the server directory to Python path for direct script execution
+server_dir = Path(__file__).resolve().parent.parent
+if str(server_dir) not in sys.path:
+    sys.path.append(str(server_dir))
+
+try:
+    from .postgres_client import PostgresClient
+    from .embedding_snapshot import EmbeddingSnapshot, normalize_rows, write_snapshot
+except ImportError:
+    from src.postgres_client import PostgresClient
+    from src.embedding_snapshot import EmbeddingSnapshot, normalize_rows, write_snapshot
+
+# Rows are scored in blocks when stored as float16 so only one block is upcast at a time
+FLOAT16_BLOCK_ROWS = 8192
+# Delta segments from incremental refreshes are merged once there are more than this many
+MAX_DELTA_SEGMENTS = 8
+
+@dataclass
+class IndexSegment:
+    """A contiguous block of chunk embeddings together with the chunk rows they belong to"""
+    ids: np.ndarray  # (n,) int64 chunk IDs
+    embeddings: np.ndarray  # (n, dim) unit-length float32/float16 matrix (possibly memory-mapped)
+    texts: Sequence[str]  # Chunk text per row
+    metadata: Sequence[Dict[str, Any]]  # Chunk metadata per row
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+class InMemoryVectorIndex:
+    """
+    Exact in-process vector search over all chunk embeddings.
+
+    Postgres stays the source of truth: the index is loaded from the `chunks` table (or a
+    snapshot of it) and refreshed incrementally by appending newly inserted chunks. Deleted
+    chunks trigger a full reload; in-place updates of existing rows are not detected.
+    """
+
+    def __init__(self, postgres_client: Optional[PostgresClient] = None, snapshot_path: Optional[str] = None,
+                 dtype: str = 'float32', refresh_interval: float = 30.0):
+        """
+        Initialize the InMemoryVectorIndex.
+
+        Args:
+            postgres_client (PostgresClient, optional): Dedicated client used for loading and refreshing
+            snapshot_path (str, optional): Snapshot file to memory-map at startup (see embedding_snapshot)
+            dtype (str): Storage type of the embedding matrix, 'float32' or 'float16'
+            refresh_interval (float): Seconds between background refreshes (0 disables them)
+        """
+        if dtype not in ('float32', 'float16'):
+            raise ValueError(f"Unsupported index dtype: {dtype}")
+
+        self.postgres_client = postgres_client or PostgresClient()
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.dtype = np.dtype(dtype)
+        self.refresh_interval = refresh_interval
+
+        # Segments are replaced as a whole tuple so searches never see a half-applied refresh
+        self._segments: Tuple[IndexSegment, ...] = ()
+        self._count = 0
+        self._max_id = 0
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self._segments)
+
+    def load(self) -> None:
+        """Load the index from the snapshot if available, then catch up with the database."""
+        if self.snapshot_path and self.snapshot_path.exists():
+            segment = self._load_snapshot(self.snapshot_path)
+            self._set_segments((segment,) if len(segment) else ())
+            print(f"Loaded {len(segment)} embeddings from snapshot {self.snapshot_path}")
+            self.refresh()
+        else:
+            self.reload()
+
+    def reload(self) -> None:
+        """Rebuild the whole index from the database."""
+        with self._refresh_lock:
+            segment = self._fetch_segment("embedding IS NOT NULL")
+            self._set_segments((segment,) if len(segment) else ())
+        print(f"Loaded {len(segment)} embeddings from the database")
+
+    def refresh(self) -> int:
+        """
+        Bring the index up to date with the `chunks` table.
+
+        Returns:
+            int: Number of chunks appended (-1 when a full reload was needed)
+        """
+        with self._refresh_lock:
+            with self.postgres_client as db:
+                stats = db.execute_query(
+                    "SELECT count(*) AS count, coalesce(max(id), 0) AS max_id FROM chunks WHERE embedding IS NOT NULL"
+                )[0]
+            if stats['count'] == self._count and stats['max_id'] == self._max_id:
+                return 0
+
+            delta = self._fetch_segment("embedding IS NOT NULL AND id > %s", (self._max_id,))
+            if self._count + len(delta) == stats['count']:
+                segments = self._segments + ((delta,) if len(delta) else ())
+                if len(segments) > MAX_DELTA_SEGMENTS + 1:
+                    segments = (segments[0], self._merge_segments(segments[1:]))
+                self._set_segments(segments)
+                return len(delta)
+
+        # Rows were deleted (or IDs reused), so appending is not enough
+        self.reload()
+        return -1
+
+    def start_auto_refresh(self) -> None:
+        """Start a daemon thread that refreshes the index every `refresh_interval` seconds."""
+        if self.refresh_interval <= 0 or self._refresh_thread is not None:
+            return
+
+        def _run():
+            while not self._stop_event.wait(self.refresh_interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"❌ Error refreshing in-memory vector index: {e}")
+
+        self._refresh_thread = threading.Thread(target=_run, name='vector-index-refresh', daemon=True)
+        self._refresh_thread.start()
+
+    def stop_auto_refresh(self) -> None:
+        """Stop the background refresh thread."""
+        self._stop_event.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join()
+            self._refresh_thread = None
+
+    def search(self, query_embedding: np.ndarray, similarity_threshold: float = 0.5, max_results: int = 5) -> List[Dict[str, Any]]:
+        """
+        Find the chunks most similar to a query embedding.
+
+        Args:
+            query_embedding (np.ndarray): Unit-length query embedding
+            similarity_threshold (float): Minimum cosine similarity to include
+            max_results (int): Maximum number of results to return
+
+        Returns:
+            List[Dict[str, Any]]: Rows shaped like `search_similar_chunks` (chunk_id, chunk_text, metadata, similarity)
+        """
+        return self.search_batch(np.asarray(query_embedding)[None, :], similarity_threshold, max_results)[0]
+
+    def search_batch(self, query_embeddings: np.ndarray, similarity_threshold: float = 0.5, max_results: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Find the most similar chunks for several query embeddings with one matrix product per segment.
+
+        Args:
+            query_embeddings (np.ndarray): (q, dim) unit-length query embeddings
+            similarity_threshold (float): Minimum cosine similarity to include
+            max_results (int): Maximum number of results per query
+
+        Returns:
+            List[List[Dict[str, Any]]]: Results per query, best first
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        segments = self._segments
+        per_query: List[List[Tuple[float, IndexSegment, int]]] = [[] for _ in range(len(queries))]
+
+        for segment in segments:
+            scores = self._score(segment.embeddings, queries)
+            k = min(max_results, scores.shape[1])
+            if k <= 0:
+                continue
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            for q, rows in enumerate(top):
+                for row in rows:
+                    score = float(scores[q, row])
+                    if score > similarity_threshold:
+                        per_query[q].append((score, segment, int(row)))
+
+        results = []
+        for candidates in per_query:
+            candidates.sort(key=lambda c: c[0], reverse=True)
+            results.append([
+                {
+                    'chunk_id': int(segment.ids[row]),
+                    'chunk_text': segment.texts[row],
+                    'metadata': segment.metadata[row],
+                    'similarity': score
+                }
+                for score, segment, row in candidates[:max_results]
+            ])
+        return results
+
+    def save_snapshot(self, snapshot_path: str) -> None:
+        """
+        Write the current index to a snapshot file that later processes can memory-map.
+
+        Args:
+            snapshot_path (str): Target file path
+        """
+        segment = self._merge_segments(self._segments)
+        write_snapshot(snapshot_path, segment.ids, segment.embeddings, segment.texts, segment.metadata, self.dtype.name)
+        print(f"✅ Saved snapshot with {len(segment)} embeddings to {snapshot_path}")
+
+    def _score(self, embeddings: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Compute (q, n) cosine similarities between queries and one segment."""
+        if embeddings.dtype == np.float32:
+            return queries @ embeddings.T
+
+        scores = np.empty((len(queries), len(embeddings)), dtype=np.float32)
+        for start in range(0, len(embeddings), FLOAT16_BLOCK_ROWS):
+            block = embeddings[start:start + FLOAT16_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        return scores
+
+    def _fetch_segment(self, where: str, params: Optional[tuple] = None) -> IndexSegment:
+        """Load chunk rows matching a WHERE clause from the database into a new segment."""
+        with self.postgres_client as db:
+            rows = db.execute_query(
+                f"SELECT id, chunk_text, metadata, embedding FROM chunks WHERE {where} ORDER BY id",
+                params,
+                binary=True
+            )
+
+        if not rows:
+            return IndexSegment(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=self.dtype), [], [])
+
+        embeddings = normalize_rows(np.vstack([row['embedding'] for row in rows]))
+        return IndexSegment(
+            ids=np.array([row['id'] for row in rows], dtype=np.int64),
+            embeddings=np.ascontiguousarray(embeddings, dtype=self.dtype),
+            texts=[row['chunk_text'] for row in rows],
+            metadata=[row['metadata'] for row in rows]
+        )
+
+    def _load_snapshot(self, snapshot_path: Path) -> IndexSegment:
+        """Memory-map a snapshot file; its embedding matrix stays shared with other processes."""
+        snapshot = EmbeddingSnapshot(snapshot_path)
+        embeddings = snapshot.embeddings
+        if embeddings.dtype != self.dtype:
+            print(f"Warning: snapshot stores {embeddings.dtype}, converting to {self.dtype} (pages will not be shared)")
+            embeddings = embeddings.astype(self.dtype)
+        return IndexSegment(ids=snapshot.ids, embeddings=embeddings, texts=snapshot.texts, metadata=snapshot.metadata)
+
+    def _merge_segments(self, segments: Tuple[IndexSegment, ...]) -> IndexSegment:
+        """Concatenate segments into a single in-memory segment."""
+        segments = [segment for segment in segments if len(segment)]
+        if len(segments) == 1:
+            return segments[0]
+        if not segments:
+            return IndexSegment(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=self.dtype), [], [])
+        return IndexSegment(
+            ids=np.concatenate([s.ids for s in segments]),
+            embeddings=np.concatenate([s.embeddings for s in segments]).astype(self.dtype, copy=False),
+            texts=[text for s in segments for text in s.texts],
+            metadata=[meta for s in segments for meta in s.metadata]
+        )
+
+    def _set_segments(self, segments: Tuple[IndexSegment, ...]) -> None:
+        """Atomically swap in a new set of segments and update the refresh bookkeeping."""
+        self._segments = segments
+        self._count = sum(len(segment) for segment in segments)
+        self._max_id = max((int(segment.ids.max()) for segment in segments if len(segment)), default=0)
+
+# Example usage (can be run directly for testing)
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv(server_dir / '.env')
+
+    index = InMemoryVectorIndex(snapshot_path=sys.argv[1] if len(sys.argv) > 1 else None)
+    index.load()
+    print(f"Index holds {len(index)} embeddings")
@@ -0,0 +1,165 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+def load_curated_questions(path: str) -> List[str]:
+    """
+    Load the curated question list.
+
+    Args:
+        path (str): JSON file containing a list of questions
+
+    Returns:
+        List[str]: The questions, or an empty list when the file is missing
+    """
+    file_path = Path(path)
+    if not file_path.exists():
+        print(f"Warning: curated questions file not found: {file_path}")
+        return []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        questions = json.load(f)
+    return [question for question in questions if isinstance(question, str) and question.strip()]
+
+class PrecomputedAnswers:
+    """
+    Answers for a fixed list of curated questions, computed ahead of time.
+
+    `warm()` runs the full search pipeline for every question and keeps the responses in memory
+    together with the corpus version they were computed against. A background thread re-checks
+    the corpus version every `check_interval` seconds and recomputes everything after an ingest,
+    so answers are served instantly but never outlive the corpus they were built from. Answers that
+    come from an external service (whose content the corpus version does not track) are instead
+    recomputed once they are older than `max_age` seconds.
+
+    Failed computations, and responses rejected by `is_valid_fn`, are never stored; those questions
+    are retried on the next check instead of being pinned until the corpus changes.
+    """
+
+    def __init__(self, questions: List[str], compute_fn: Callable[[str], Any], key_fn: Callable[[str], Hashable],
+                 corpus_version_fn: Optional[Callable[[], str]] = None, check_interval: float = 60.0,
+                 is_valid_fn: Optional[Callable[[Any], bool]] = None, max_age: Optional[float] = None):
+        """
+        Initialize the PrecomputedAnswers.
+
+        Args:
+            questions (List[str]): Curated questions to precompute
+            compute_fn (Callable[[str], Any]): Computes the response for a question
+            key_fn (Callable[[str], Hashable]): Maps a question to its lookup key
+            corpus_version_fn (Callable[[], str], optional): Returns the current corpus version
+            check_interval (float): Seconds between corpus version checks
+            is_valid_fn (Callable[[Any], bool], optional): Returns False for responses that must not
+                be served (e.g. a failed analysis)
+            max_age (float, optional): Seconds after which all answers are recomputed regardless of
+                the corpus version
+        """
+        self.questions = questions
+        self.compute_fn = compute_fn
+        self.key_fn = key_fn
+        self.corpus_version_fn = corpus_version_fn
+        self.check_interval = check_interval
+        self.is_valid_fn = is_valid_fn
+        self.max_age = max_age
+
+        self._answers: Dict[Hashable, Any] = {}
+        self._corpus_version: Optional[str] = None
+        self._warmed_at = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get the precomputed response for a lookup key.
+
+        Args:
+            key (Hashable): Lookup key built with the same key function
+
+        Returns:
+            Optional[Any]: The response, or None when the question was not precomputed
+        """
+        return self._answers.get(key)
+
+    def _current_version(self) -> Optional[str]:
+        if self.corpus_version_fn is None:
+            return None
+        try:
+            return self.corpus_version_fn()
+        except Exception as e:
+            print(f"❌ Error checking corpus version: {e}")
+            return None
+
+    def _compute(self, question: str) -> Optional[Any]:
+        try:
+            response = self.compute_fn(question)
+        except Exception as e:
+            print(f"❌ Error precomputing answer for '{question[:50]}': {e}")
+            return None
+        if self.is_valid_fn is not None and not self.is_valid_fn(response):
+            print(f"❌ Discarding incomplete precomputed answer for '{question[:50]}'")
+            return None
+        return response
+
+    def warm(self, only_missing: bool = False) -> int:
+        """
+        Compute the responses for the curated questions and swap them in.
+
+        Args:
+            only_missing (bool): Keep the current answers and only compute questions that have none
+                (e.g. because they failed during the last warm-up)
+
+        Returns:
+            int: Number of questions answered successfully
+        """
+        version = self._corpus_version if only_missing else self._current_version()
+        answers: Dict[Hashable, Any] = dict(self._answers) if only_missing else {}
+        for question in self.questions:
+            if self._stop_event.is_set():
+                break
+            key = self.key_fn(question)
+            if key in answers:
+                continue
+            response = self._compute(question)
+            if response is not None:
+                answers[key] = response
+
+        # Swap the whole dict so readers never see a half-built set
+        self._answers = answers
+        self._corpus_version = version
+        if not only_missing:
+            self._warmed_at = time.monotonic()
+        print(f"Precomputed {len(answers)}/{len(self.questions)} curated answers (corpus version {version})")
+        return len(answers)
+
+    def _run(self) -> None:
+        self.warm()
+        while not self._stop_event.wait(self.check_interval):
+            version = self._current_version()
+            if version is not None and version != self._corpus_version:
+                print(f"Corpus changed ({self._corpus_version} -> {version}), recomputing curated answers")
+                # Stale answers must not be served while the new ones are computed
+                self._answers = {}
+                self.warm()
+            elif self.max_age is not None and time.monotonic() - self._warmed_at >= self.max_age:
+                # The old answers are still valid for this corpus, so keep serving them until the swap
+                self.warm()
+            elif len(self._answers) < len(self.questions):
+                self.warm(only_missing=True)
+
+    def start(self) -> None:
+        """Warm up in a background thread and keep the answers in sync with the corpus."""
+        if self._thread is not None or not self.questions:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='curated-warmup', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -1,11 +1,13 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
+import { SemanticSearchService } from '../services/semanticSearchService';
 import './WelcomePage.scss';
 
 interface WelcomePageProps {
   onQuestionSelect?: (question: string) => void;
 }
 
-const sampleQuestions = [
+// Shown until the server's curated list arrives, or if it cannot be fetched
+const fallbackQuestions = [
   "What are the hours for the westbound tracks?",
   "What are the navigation performance requirements for the NAT?",
   "Is datalink a requirement for flying the NAT?",
@@ -14,6 +16,23 @@ const sampleQuestions = [
 ];
 
 const WelcomePage: React.FC<WelcomePageProps> = ({ onQuestionSelect }) => {
+  const [sampleQuestions, setSampleQuestions] = useState<string[]>(fallbackQuestions);
+
+  useEffect(() => {
+    let cancelled = false;
+    SemanticSearchService.getSuggestions()
+      .then((questions) => {
+        if (!cancelled && questions.length > 0) {
+          setSampleQuestions(questions);
+        }
+      })
+      .catch(() => {
+        // Keep the fallback questions
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, []);
 
   const handleQuestionSelect = (question: string) => {
     const inputElement = document.getElementById('message-input') as HTMLInputElement;
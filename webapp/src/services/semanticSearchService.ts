@@ -1,4 +1,4 @@
-import { SemanticSearchResponse, KnowledgeBaseResponse } from '../types/semanticSearch';
+import { SemanticSearchResponse, SuggestionsResponse, KnowledgeBaseResponse } from '../types/semanticSearch';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
@@ -25,6 +25,22 @@ export class SemanticSearchService {
     }
   }
 
+  static async getSuggestions(): Promise<string[]> {
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/suggestions`);
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      const data = await response.json() as SuggestionsResponse;
+      return data.questions;
+    } catch (error) {
+      console.error('Error fetching suggestions:', error);
+      throw error;
+    }
+  }
+
   static async ask_knowledge_base(
     query: string,
     temperature: number = 0.7,
@@ -17,6 +17,8 @@ export interface ChunkMetadata {
   num_sentences: number;
   is_first_chunk: boolean;
   spans_multiple_pages: boolean;
+  source_file_path?: string;
+  filename?: string;
 }
 
 export interface SearchResult {
@@ -37,6 +39,10 @@ export interface SemanticSearchResponse {
   analysis: SearchAnalysis;
 }
 
+export interface SuggestionsResponse {
+  questions: string[];
+}
+
 export interface Message {
     sender: string;
     message: string;